@@ -3,7 +3,14 @@ from app.config.config import get_config_by_name
 from app.initialize_functions import (
     initialize_route,
     initialize_db,
+    initialize_metrics,
+    initialize_slow_query_log,
+    initialize_json,
+    initialize_read_replica,
+    initialize_appointment_index,
+    initialize_response_cache,
     initialize_auth,
+    initialize_commands,
     start_scheduler,
 )
 
@@ -22,14 +29,31 @@ def create_app(config=None) -> Flask:
     if config:
         app.config.from_object(get_config_by_name(config))
 
-    start_scheduler(app)
-
     # Initialize extensions
     initialize_db(app)
 
+    initialize_metrics(app)
+
+    initialize_slow_query_log(app)
+
+    initialize_json(app)
+
+    initialize_read_replica(app)
+
+    initialize_appointment_index(app)
+
+    initialize_response_cache(app)
+
     initialize_auth(app)
 
     # Register blueprints
     initialize_route(app)
 
+    initialize_commands(app)
+
+    # Scheduled jobs run inside the web workers unless a separate
+    # `flask scheduler` process is configured
+    if app.config.get("SCHEDULER_MODE", "web") == "web":
+        start_scheduler(app)
+
     return app
@@ -2,6 +2,9 @@ import os
 
 from dotenv import load_dotenv
 
+from app.db.db import REPLICA_BIND
+from app.utils.db_pool import build_engine_options
+
 load_dotenv()
 
 
@@ -14,11 +17,138 @@ class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
 
+    # Connection pool of the database engine: persistent connections,
+    # extra connections under load, seconds to wait for a free connection,
+    # seconds before a connection is replaced and whether connections are
+    # checked before use so ones dropped by a failover are replaced
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        return build_engine_options(
+            self.SQLALCHEMY_DATABASE_URI,
+            pool_size=self.DB_POOL_SIZE,
+            max_overflow=self.DB_MAX_OVERFLOW,
+            pool_timeout=self.DB_POOL_TIMEOUT,
+            pool_recycle=self.DB_POOL_RECYCLE,
+            pool_pre_ping=self.DB_POOL_PRE_PING,
+        )
+
+    # Read replica serving GET, HEAD and OPTIONS requests. A client that
+    # writes reads the primary for READ_REPLICA_STICKY_SECONDS afterwards.
+    READ_REPLICA_DATABASE_URI = os.getenv("READ_REPLICA_DATABASE_URI")
+    READ_REPLICA_STICKY_SECONDS = float(os.getenv("READ_REPLICA_STICKY_SECONDS", 5))
+
+    @property
+    def SQLALCHEMY_BINDS(self):
+        if not self.READ_REPLICA_DATABASE_URI:
+            return None
+        return {REPLICA_BIND: self.READ_REPLICA_DATABASE_URI}
+
+    # Create missing tables when the app boots. Off by default so workers do
+    # not issue schema queries on start; run `flask init-db` instead.
+    DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "False").lower() == "true"
+
+    # "web" runs scheduled jobs in the web processes, "process" only in a
+    # separate `flask scheduler` process and "off" nowhere. Either way one
+    # process per deployment is elected through a lease renewed every
+    # SCHEDULER_LEASE_TTL / 3 seconds.
+    SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "web")
+    SCHEDULER_LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", 60))
+
+    # Per-process cache of authenticated principals behind the user loader
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 1024))
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 300))
+
+    # Password hashing: werkzeug method (e.g. pbkdf2:sha256:600000), size of
+    # the hashing thread pool, hashes that may be queued or running at once
+    # and seconds a caller waits for its hash before getting a 503.
+    # Stored hashes made with another method are upgraded on login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:260000")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+    # Signed bearer tokens issued by POST /auth/token; bumping the key
+    # version invalidates every token already issued
+    AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", 900))
+    AUTH_TOKEN_KEY_VERSION = int(os.getenv("AUTH_TOKEN_KEY_VERSION", 1))
+
+    # Request latency and SQL metrics served in Prometheus format at /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    # Directory shared by the gunicorn workers, where each one writes its
+    # metrics so /metrics serves the sum over all workers; without it a
+    # scrape only sees the worker that happened to answer
+    METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+    # Statements slower than SLOW_QUERY_THRESHOLD seconds (0 disables) are
+    # logged and the last SLOW_QUERY_LOG_SIZE kept; on Postgres this share
+    # of slow SELECTs is also run under EXPLAIN (ANALYZE, BUFFERS)
+    SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", 0.5))
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(
+        os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1)
+    )
+    SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", 100))
+    # Bound parameters hold password hashes and personal data such as KTP
+    # numbers, so they are left out of slow query entries unless enabled
+    SLOW_QUERY_LOG_PARAMETERS = (
+        os.getenv("SLOW_QUERY_LOG_PARAMETERS", "False").lower() == "true"
+    )
+
+    # What a view exceeding its query budget, or repeating one statement
+    # more than QUERY_BUDGET_REPEAT_LIMIT times (a likely N+1), does:
+    # "raise", "log" or "off"
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+    QUERY_BUDGET_REPEAT_LIMIT = int(os.getenv("QUERY_BUDGET_REPEAT_LIMIT", 3))
+
+    # JSON encoder of responses and NDJSON streams: "orjson" or "json" for
+    # the standard library
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+    # Cache of GET responses of rarely changing resources such as doctors.
+    # The backend is the dotted path of a CacheBackend; the default LRU is
+    # per process, so other workers see a write after at most the TTL.
+    RESPONSE_CACHE_ENABLED = (
+        os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    )
+    RESPONSE_CACHE_BACKEND = os.getenv(
+        "RESPONSE_CACHE_BACKEND", "app.utils.cache.LRUCache"
+    )
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 60))
+
+    # In-process per-doctor appointment index used for conflict checks
+    APPOINTMENT_INDEX_ENABLED = (
+        os.getenv("APPOINTMENT_INDEX_ENABLED", "False").lower() == "true"
+    )
+    APPOINTMENT_INDEX_TTL = int(os.getenv("APPOINTMENT_INDEX_TTL", 60))
+
+    # Rows fetched per round trip when streaming list endpoints as NDJSON
+    STREAM_YIELD_PER = int(os.getenv("STREAM_YIELD_PER", 1000))
+
+    # BigQuery sync pipeline: rows per fetched page, patients upserted per
+    # statement and commit, chunks queued per writer and writer threads
+    BIGQUERY_SYNC_PAGE_SIZE = int(os.getenv("BIGQUERY_SYNC_PAGE_SIZE", 10000))
+    BIGQUERY_SYNC_CHUNK_SIZE = int(os.getenv("BIGQUERY_SYNC_CHUNK_SIZE", 1000))
+    BIGQUERY_SYNC_QUEUE_DEPTH = int(os.getenv("BIGQUERY_SYNC_QUEUE_DEPTH", 4))
+    BIGQUERY_SYNC_WRITERS = int(os.getenv("BIGQUERY_SYNC_WRITERS", 4))
+    # vaccine_data column used as the incremental sync high-water mark
+    BIGQUERY_SYNC_WATERMARK_COLUMN = os.getenv(
+        "BIGQUERY_SYNC_WATERMARK_COLUMN", "ingested_at"
+    )
+
 
 class DevelopmentConfig(BaseConfig):
     """Development configuration."""
 
     DEBUG = True
+    DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "True").lower() == "true"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 2))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 2))
 
 
 class TestingConfig(BaseConfig):
@@ -26,12 +156,27 @@ class TestingConfig(BaseConfig):
 
     DEBUG = True
     TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URI", "sqlite://")
+    READ_REPLICA_DATABASE_URI = os.getenv("TEST_READ_REPLICA_DATABASE_URI")
+    DB_CREATE_ALL = True
+    DB_POOL_TIMEOUT = 5
+    SCHEDULER_MODE = "off"
+    QUERY_BUDGET_MODE = "raise"
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
 
 
 class ProductionConfig(BaseConfig):
     """Production configuration."""
 
     DEBUG = False
+    # Fail fast instead of queueing requests behind an exhausted pool
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+
+class StagingConfig(ProductionConfig):
+    """Staging configuration."""
+
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log")
 
 
 def get_config_by_name(config_name):
@@ -40,6 +185,8 @@ def get_config_by_name(config_name):
         return DevelopmentConfig()
     elif config_name == "production":
         return ProductionConfig()
+    elif config_name == "staging":
+        return StagingConfig()
     elif config_name == "testing":
         return TestingConfig()
     else:
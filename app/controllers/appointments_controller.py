@@ -1,40 +1,104 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from app.db.db import db
-from app.models.appointment import Appointment
+from app.models.appointment import (
+    APPOINTMENT_DURATION,
+    BOOKING_WINDOW_CONSTRAINT,
+    Appointment,
+)
 from app.models.doctor import Doctor
 from app.models.patient import Patient
+from app.models.table_version import mark_tables_changed
+from app.utils.appointment_index import appointment_index
+from app.utils.availability import is_slot_free
+from app.utils.etags import (
+    PRECONDITION_FAILED,
+    precondition_failed,
+    row_conditional_get,
+    row_precondition,
+    table_conditional_get,
+)
+from app.utils.pagination import decode_cursor, encode_cursor, get_page_size
+from app.utils.query_budget import query_budget
+from app.utils.serializers import serializers
+from app.utils.fields import get_requested_fields
+from app.utils.streaming import stream_ndjson, wants_stream
+from bisect import insort
 from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 
 
 VALID_STATUSES = ["IN_QUEUE", "DONE", "CANCELLED"]
 
+BOOKED_ERROR = "Doctor is already booked within 30 minutes of this time"
+
+# Largest number of appointments accepted by one bulk request
+MAX_BULK_APPOINTMENTS = 5000
+
+# Postgres SQLSTATE codes raised by the appointments constraints
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+# Whether each engine's database has the booking window constraint, looked
+# up once per process
+_booking_window_enforced = {}
+
+
+def booking_window_enforced_by_db():
+    """
+    Whether the database enforces the 30-minute booking window itself.
+
+    Only Postgres databases that carry the exclusion constraint do; ones
+    that predate it and were never migrated still need the pre-checks.
+    """
+    engine = db.engine
+    enforced = _booking_window_enforced.get(engine)
+    if enforced is None:
+        enforced = engine.dialect.name == "postgresql" and (
+            engine.execute(
+                db.text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+                name=BOOKING_WINDOW_CONSTRAINT,
+            ).scalar()
+            is not None
+        )
+        _booking_window_enforced[engine] = enforced
+    return enforced
+
+
+def is_time_available_for_appointment(doctor_id, new_appointment_datetime, exclude_id=None):
+    if current_app.config.get("APPOINTMENT_INDEX_ENABLED"):
+        return appointment_index.is_available(
+            doctor_id, new_appointment_datetime, exclude_id=exclude_id
+        )
 
-def is_time_available_for_appointment(doctor_id, new_appointment_datetime):
     previous_appointment = Appointment.query.filter(
         Appointment.doctor_id == doctor_id,
+        Appointment.id != exclude_id,
         Appointment.datetime <= new_appointment_datetime
     ).order_by(Appointment.datetime.desc()).first()
 
     next_appointment = Appointment.query.filter(
         Appointment.doctor_id == doctor_id,
+        Appointment.id != exclude_id,
         Appointment.datetime >= new_appointment_datetime
     ).order_by(Appointment.datetime.asc()).first()
 
     # Check if the time difference with the previous appointment is at least 30 minutes
     if previous_appointment:
         time_diff = new_appointment_datetime - previous_appointment.datetime
-        if time_diff < timedelta(minutes=30):
+        if time_diff < APPOINTMENT_DURATION:
             return False
 
     # Check if the time difference with the next appointment is at least 30 minutes
     if next_appointment:
         time_diff = next_appointment.datetime - new_appointment_datetime
-        if time_diff < timedelta(minutes=30):
+        if time_diff < APPOINTMENT_DURATION:
             return False
 
     return True
 
 
+@query_budget(8)
 def create_appointment():
     data = request.get_json()
     patient_id = data.get("patient_id")
@@ -56,9 +120,12 @@ def create_appointment():
     if status and status not in VALID_STATUSES:
         return jsonify({"error": "Invalid status value"}), 400
 
+    # On Postgres the foreign key and the booking window exclusion constraint
+    # reject bad inserts, so the pre-check round trips are skipped there
+    enforced_by_db = booking_window_enforced_by_db()
+
     # Check if patient exists
-    patient = Patient.query.get(patient_id)
-    if not patient:
+    if not enforced_by_db and not Patient.query.get(patient_id):
         return jsonify({"error": "Patient not found"}), 404
 
     # Check if doctor exists
@@ -66,10 +133,6 @@ def create_appointment():
     if not doctor:
         return jsonify({"error": "Doctor not found"}), 404
 
-    # Check for overlapping appointments (ignoring seconds)
-    if not is_time_available_for_appointment(doctor_id, appointment_datetime):
-        return jsonify({"error": "Doctor is already booked within 30 minutes of this time"}), 400
-
     # Check if the appointment time is within doctor's working hours
     if not (doctor.work_start_time <= appointment_time <= doctor.work_end_time):
         return (
@@ -77,6 +140,12 @@ def create_appointment():
             400,
         )
 
+    # Check for overlapping appointments (ignoring seconds)
+    if not enforced_by_db and not is_time_available_for_appointment(
+        doctor_id, appointment_datetime
+    ):
+        return jsonify({"error": BOOKED_ERROR}), 400
+
     # Create new appointment
     new_appointment = Appointment(
         patient_id=patient_id,
@@ -85,87 +154,323 @@ def create_appointment():
         status=status,
     )
     db.session.add(new_appointment)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        pgcode = getattr(e.orig, "pgcode", None)
+        if pgcode == EXCLUSION_VIOLATION:
+            return jsonify({"error": BOOKED_ERROR}), 400
+        if pgcode == FOREIGN_KEY_VIOLATION:
+            return jsonify({"error": "Patient not found"}), 404
+        raise
+    appointment_index.add(doctor_id, appointment_datetime, new_appointment.id)
     return jsonify({"message": "Appointment created successfully"}), 201
 
 
+def parse_bulk_appointment(item):
+    if not isinstance(item, dict):
+        return None, "Missing data"
+
+    patient_id = item.get("patient_id")
+    doctor_id = item.get("doctor_id")
+    datetime_str = item.get("datetime")
+    status = item.get("status")
+
+    if not all([patient_id, doctor_id, datetime_str]):
+        return None, "Missing data"
+
+    try:
+        patient_id = int(patient_id)
+        doctor_id = int(doctor_id)
+    except (TypeError, ValueError):
+        return None, "Invalid patient_id or doctor_id"
+
+    try:
+        appointment_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None, "Invalid datetime format"
+
+    if status and status not in VALID_STATUSES:
+        return None, "Invalid status value"
+
+    return {
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "datetime": appointment_datetime,
+        "status": status or "IN_QUEUE",
+    }, None
+
+
+@query_budget(6)
+def create_appointments_bulk():
+    data = request.get_json()
+    items = data.get("appointments") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Missing data"}), 400
+    if len(items) > MAX_BULK_APPOINTMENTS:
+        return (
+            jsonify({"error": f"At most {MAX_BULK_APPOINTMENTS} appointments per request"}),
+            400,
+        )
+
+    results = [None] * len(items)
+    candidates = []
+    for index, item in enumerate(items):
+        values, error = parse_bulk_appointment(item)
+        if error:
+            results[index] = {"index": index, "status": 400, "error": error}
+        else:
+            candidates.append((index, values))
+
+    # Validate patients and doctors with one set-based query each
+    patient_ids = {values["patient_id"] for _, values in candidates}
+    doctor_ids = {values["doctor_id"] for _, values in candidates}
+    existing_patient_ids = set()
+    doctors = {}
+    if candidates:
+        existing_patient_ids = {
+            patient.id
+            for patient in Patient.query.with_entities(Patient.id).filter(
+                Patient.id.in_(patient_ids)
+            )
+        }
+        doctors = {
+            doctor.id: doctor
+            for doctor in Doctor.query.filter(Doctor.id.in_(doctor_ids))
+        }
+
+    # One query loads the bookings the batch can collide with, restricted to
+    # the range of the batch's datetimes for each doctor
+    requested = {}
+    for _, values in candidates:
+        if values["doctor_id"] in doctors:
+            requested.setdefault(values["doctor_id"], []).append(values["datetime"])
+    booked = {doctor_id: [] for doctor_id in requested}
+    if requested:
+        ranges = [
+            db.and_(
+                Appointment.doctor_id == doctor_id,
+                Appointment.datetime > min(datetimes) - APPOINTMENT_DURATION,
+                Appointment.datetime < max(datetimes) + APPOINTMENT_DURATION,
+            )
+            for doctor_id, datetimes in requested.items()
+        ]
+        for doctor_id, appointment_datetime in (
+            Appointment.query.with_entities(Appointment.doctor_id, Appointment.datetime)
+            .filter(db.or_(*ranges))
+            .order_by(Appointment.datetime)
+        ):
+            booked[doctor_id].append(appointment_datetime)
+
+    new_appointments = []
+    for index, values in candidates:
+        doctor = doctors.get(values["doctor_id"])
+        if values["patient_id"] not in existing_patient_ids:
+            results[index] = {"index": index, "status": 404, "error": "Patient not found"}
+        elif not doctor:
+            results[index] = {"index": index, "status": 404, "error": "Doctor not found"}
+        elif not (
+            doctor.work_start_time
+            <= values["datetime"].time()
+            <= doctor.work_end_time
+        ):
+            results[index] = {
+                "index": index,
+                "status": 400,
+                "error": "Appointment time is outside of doctor's working hours",
+            }
+        elif not is_slot_free(booked[doctor.id], values["datetime"]):
+            results[index] = {"index": index, "status": 400, "error": BOOKED_ERROR}
+        else:
+            # Later items in the batch must not collide with this one either
+            insort(booked[doctor.id], values["datetime"])
+            new_appointments.append(values)
+            results[index] = {
+                "index": index,
+                "status": 201,
+                "message": "Appointment created successfully",
+            }
+
+    if new_appointments:
+        db.session.bulk_insert_mappings(Appointment, new_appointments)
+        # Bulk inserts bypass the flush that bumps the change counter
+        mark_tables_changed(db.session, [Appointment.__tablename__])
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+                return jsonify({"error": BOOKED_ERROR}), 400
+            raise
+        for doctor_id in {values["doctor_id"] for values in new_appointments}:
+            appointment_index.invalidate(doctor_id)
+
+    return jsonify(results), 200
+
+
+APPOINTMENT_FIELDS = [
+    "id",
+    "patient_id",
+    "doctor_id",
+    "datetime",
+    "status",
+    "diagnose",
+    "notes",
+]
+
+
+appointment_serializer = serializers.register(Appointment, APPOINTMENT_FIELDS)
+
+
+@query_budget(2)
+@row_conditional_get(Appointment)
 def get_appointment(appointment_id):
-    appointment = Appointment.query.get(appointment_id)
+    try:
+        fields = get_requested_fields(APPOINTMENT_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    appointment = (
+        appointment_serializer.query(fields)
+        .filter(Appointment.id == appointment_id)
+        .first()
+    )
     if not appointment:
         return jsonify({"error": "Appointment not found"}), 404
 
-    appointment_data = {
-        "id": appointment.id,
-        "patient_id": appointment.patient_id,
-        "doctor_id": appointment.doctor_id,
-        "datetime": appointment.datetime.isoformat(),
-        "status": appointment.status,
-        "diagnose": appointment.diagnose,
-        "notes": appointment.notes,
-    }
-    return jsonify(appointment_data), 200
+    return jsonify(appointment_serializer.dump(appointment, fields)), 200
+
+
+def parse_datetime_filter(value, end_of_day=False):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+        return parsed + timedelta(days=1) if end_of_day else parsed
+
+
+def filter_appointments_query(query):
+    """
+    Apply the doctor_id, patient_id, status, from, to and cursor query
+    parameters to an appointments query.
+
+    Raises:
+        ValueError: If a parameter is malformed.
+    """
+    doctor_id = request.args.get("doctor_id")
+    if doctor_id:
+        query = query.filter(Appointment.doctor_id == int(doctor_id))
+    patient_id = request.args.get("patient_id")
+    if patient_id:
+        query = query.filter(Appointment.patient_id == int(patient_id))
+    status = request.args.get("status")
+    if status:
+        if status not in VALID_STATUSES:
+            raise ValueError("Invalid status value")
+        query = query.filter(Appointment.status == status)
+    from_str = request.args.get("from")
+    if from_str:
+        query = query.filter(Appointment.datetime >= parse_datetime_filter(from_str))
+    to_str = request.args.get("to")
+    if to_str:
+        query = query.filter(
+            Appointment.datetime < parse_datetime_filter(to_str, end_of_day=True)
+        )
+    cursor = request.args.get("cursor")
+    if cursor:
+        cursor_datetime_str, cursor_id = decode_cursor(cursor, 2)
+        cursor_datetime = datetime.fromisoformat(cursor_datetime_str)
+        query = query.filter(
+            db.tuple_(Appointment.datetime, Appointment.id)
+            > db.tuple_(cursor_datetime, int(cursor_id))
+        )
+    return query.order_by(Appointment.datetime, Appointment.id)
 
 
+@query_budget(2)
+@table_conditional_get(Appointment)
 def get_all_appointments():
-    appointments = Appointment.query.all()
-    appointments_data = [
-        {
-            "id": appoinment.id,
-            "patient_id": appoinment.patient_id,
-            "doctor_id": appoinment.doctor_id,
-            "datetime": appoinment.datetime.isoformat(),
-            "status": appoinment.status,
-            "diagnose": appoinment.diagnose,
-            "notes": appoinment.notes,
-        }
-        for appoinment in appointments
-    ]
-    return jsonify(appointments_data), 200
+    try:
+        fields = get_requested_fields(APPOINTMENT_FIELDS)
+        limit = get_page_size()
+        # The cursor is built from the datetime and id of the last row
+        query = appointment_serializer.query(fields, extra=["datetime", "id"])
+        query = filter_appointments_query(query)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameters: {e}"}), 400
+
+    # A stream walks every matching row, so the page size does not apply
+    if wants_stream():
+        return stream_ndjson(query, appointment_serializer.compile(fields))
+
+    # Fetch one extra row to know whether another page follows
+    appointments = query.limit(limit + 1).all()
+    has_next = len(appointments) > limit
+    appointments = appointments[:limit]
+
+    response = jsonify(appointment_serializer.dump_all(appointments, fields))
+    if has_next:
+        last = appointments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.datetime.isoformat(), last.id
+        )
+    return response, 200
 
 
+@query_budget(8)
+@row_precondition(Appointment)
 def update_appointment(appointment_id):
     data = request.get_json()
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
         return jsonify({"error": "Appointment not found"}), 404
+    if precondition_failed(appointment):
+        return jsonify(PRECONDITION_FAILED), 412
 
     patient_id = data.get("patient_id")
-    doctor_id = data.get("doctor_id")
+    # The appointment keeps its doctor unless the request moves it
+    doctor_id = data.get("doctor_id", appointment.doctor_id)
     datetime_str = data.get("datetime")
     status = data.get("status")
     diagnose = data.get("diagnose")
     notes = data.get("notes")
 
+    new_datetime = appointment.datetime
     if datetime_str:
         try:
             new_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
-            # Check if new datetime overlaps with other appointments for the same doctor
-            if Appointment.query.filter(
-                Appointment.doctor_id == doctor_id,
-                Appointment.id != appointment_id,
-                db.extract("hour", Appointment.datetime) == new_datetime.hour,
-                db.extract("minute", Appointment.datetime) == new_datetime.minute,
-            ).first():
-                return jsonify({"error": "Doctor is already booked at this time"}), 400
-
-            # Check if new datetime is within doctor's working hours
-            doctor = Doctor.query.get(doctor_id)
-            if not (
-                doctor.work_start_time <= new_datetime.time() <= doctor.work_end_time
-            ):
-                return (
-                    jsonify(
-                        {
-                            "error": "Appointment time is outside of doctor's working hours"
-                        }
-                    ),
-                    400,
-                )
-
-            appointment.datetime = new_datetime
         except ValueError:
             return jsonify({"error": "Invalid datetime format"}), 400
 
+    previous_doctor_id = appointment.doctor_id
+    if datetime_str or doctor_id != previous_doctor_id:
+        doctor = Doctor.query.get(doctor_id)
+        if not doctor:
+            return jsonify({"error": "Doctor not found"}), 404
+
+        # Check if new datetime overlaps with other appointments for the same doctor
+        if not is_time_available_for_appointment(
+            doctor.id, new_datetime, exclude_id=appointment_id
+        ):
+            return jsonify({"error": "Doctor is already booked at this time"}), 400
+
+        # Check if new datetime is within doctor's working hours
+        if not (
+            doctor.work_start_time <= new_datetime.time() <= doctor.work_end_time
+        ):
+            return (
+                jsonify(
+                    {
+                        "error": "Appointment time is outside of doctor's working hours"
+                    }
+                ),
+                400,
+            )
+
+        appointment.doctor_id = doctor.id
+        appointment.datetime = new_datetime
+
     if status:
         if status not in VALID_STATUSES:
             return jsonify({"error": "Invalid status value"}), 400
@@ -175,15 +480,28 @@ def update_appointment(appointment_id):
     if notes:
         appointment.notes = notes
 
-    db.session.commit()
+    doctor_id = appointment.doctor_id
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            return jsonify({"error": BOOKED_ERROR}), 400
+        raise
+    appointment_index.invalidate(doctor_id)
+    if previous_doctor_id != doctor_id:
+        appointment_index.invalidate(previous_doctor_id)
     return jsonify({"message": "Appointment updated successfully"}), 200
 
 
+@query_budget(4)
 def delete_appointment(appointment_id):
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
         return jsonify({"error": "Appointment not found"}), 404
 
+    doctor_id = appointment.doctor_id
     db.session.delete(appointment)
     db.session.commit()
+    appointment_index.invalidate(doctor_id)
     return jsonify({"message": "Appointment deleted successfully"}), 200
@@ -1,9 +1,33 @@
 from flask import request, jsonify
-from datetime import datetime
+from concurrent.futures import TimeoutError as HashTimeoutError
+from datetime import datetime, timedelta
 from app.db.db import db
+from app.models.appointment import Appointment, APPOINTMENT_DURATION
 from app.models.doctor import Doctor
+from app.utils.availability import compute_open_slots
+from app.utils.etags import (
+    PRECONDITION_FAILED,
+    precondition_failed,
+    row_conditional_get,
+    row_precondition,
+    table_conditional_get,
+)
+from app.utils.fields import get_requested_fields
+from app.utils.passwords import HASH_BUSY_ERROR
+from app.utils.query_budget import query_budget
+from app.utils.response_cache import response_cache
+from app.utils.serializers import serializers
+from app.utils.streaming import stream_ndjson, wants_stream
 
 
+# Response cache namespace of the doctor list and detail views
+DOCTORS_CACHE = "doctors"
+
+# Longest date range a single availability request may cover
+MAX_AVAILABILITY_DAYS = 31
+
+
+@query_budget(3)
 def create_doctor():
     data = request.get_json()
     name = data.get('name')
@@ -30,54 +54,72 @@ def create_doctor():
     if Doctor.query.filter_by(username=username).first():
         return jsonify({"error": "Username already exists"}), 400
 
-    new_doctor = Doctor(
-        name=name,
-        username=username,
-        password=password,
-        gender=gender,
-        birthdate=birthdate,
-        work_start_time=work_start_time,
-        work_end_time=work_end_time
-    )
+    try:
+        new_doctor = Doctor(
+            name=name,
+            username=username,
+            password=password,
+            gender=gender,
+            birthdate=birthdate,
+            work_start_time=work_start_time,
+            work_end_time=work_end_time
+        )
+    except HashTimeoutError:
+        return jsonify({"error": HASH_BUSY_ERROR}), 503
     db.session.add(new_doctor)
     db.session.commit()
+    response_cache.invalidate(DOCTORS_CACHE)
     return jsonify({"message": "Doctor created successfully"}), 201
 
 
+DOCTOR_FIELDS = [
+    "id",
+    "name",
+    "username",
+    "gender",
+    "birthdate",
+    "work_start_time",
+    "work_end_time",
+]
+
+
+doctor_serializer = serializers.register(Doctor, DOCTOR_FIELDS)
+
+
+@query_budget(2)
+@response_cache.cached(DOCTORS_CACHE)
+@row_conditional_get(Doctor)
 def get_doctor(doctor_id):
-    doctor = Doctor.query.get(doctor_id)
+    try:
+        fields = get_requested_fields(DOCTOR_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    doctor = doctor_serializer.query(fields).filter(Doctor.id == doctor_id).first()
     if not doctor:
         return jsonify({"error": "Doctor not found"}), 404
 
-    doctor_data = {
-        "id": doctor.id,
-        "name": doctor.name,
-        "username": doctor.username,
-        "gender": doctor.gender,
-        "birthdate": doctor.birthdate.isoformat(),
-        "work_start_time": doctor.work_start_time.isoformat(),
-        "work_end_time": doctor.work_end_time.isoformat()
-    }
-    return jsonify(doctor_data), 200
+    return jsonify(doctor_serializer.dump(doctor, fields)), 200
 
 
+@query_budget(2)
+@response_cache.cached(DOCTORS_CACHE)
+@table_conditional_get(Doctor)
 def get_all_doctors():
-    doctors = Doctor.query.all()
-    doctors_data = [
-        {
-            "id": doctor.id,
-            "name": doctor.name,
-            "username": doctor.username,
-            "gender": doctor.gender,
-            "birthdate": doctor.birthdate.isoformat(),
-            "work_start_time": doctor.work_start_time.isoformat(),
-            "work_end_time": doctor.work_end_time.isoformat(),
-        }
-        for doctor in doctors
-    ]
-    return jsonify(doctors_data), 200
+    try:
+        fields = get_requested_fields(DOCTOR_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = doctor_serializer.query(fields).order_by(Doctor.id)
+    if wants_stream():
+        return stream_ndjson(query, doctor_serializer.compile(fields))
+
+    return jsonify(doctor_serializer.dump_all(query, fields)), 200
 
 
+@query_budget(5)
+@row_precondition(Doctor)
 def update_doctor(doctor_id):
     data = request.get_json()
     name = data.get('name')
@@ -91,6 +133,8 @@ def update_doctor(doctor_id):
     doctor = Doctor.query.get(doctor_id)
     if not doctor:
         return jsonify({"error": "Doctor not found"}), 404
+    if precondition_failed(doctor):
+        return jsonify(PRECONDITION_FAILED), 412
 
     # Convert and update data
     try:
@@ -110,14 +154,20 @@ def update_doctor(doctor_id):
             return jsonify({"error": "Username already exists"}), 400
         doctor.username = username
     if password:
-        doctor.password = password
+        try:
+            doctor.password = password
+        except HashTimeoutError:
+            db.session.rollback()
+            return jsonify({"error": HASH_BUSY_ERROR}), 503
     if gender:
         doctor.gender = gender
 
     db.session.commit()
+    response_cache.invalidate(DOCTORS_CACHE)
     return jsonify({"message": "Doctor updated successfully"}), 200
 
 
+@query_budget(3)
 def delete_doctor(doctor_id):
     doctor = Doctor.query.get(doctor_id)
     if not doctor:
@@ -125,4 +175,92 @@ def delete_doctor(doctor_id):
 
     db.session.delete(doctor)
     db.session.commit()
+    response_cache.invalidate(DOCTORS_CACHE)
     return jsonify({"message": "Doctor deleted successfully"}), 200
+
+
+def parse_availability_range():
+    from_str = request.args.get("from")
+    to_str = request.args.get("to")
+    if not all([from_str, to_str]):
+        return None, (jsonify({"error": "Missing data"}), 400)
+
+    try:
+        start_date = datetime.strptime(from_str, "%Y-%m-%d").date()
+        end_date = datetime.strptime(to_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None, (jsonify({"error": "Invalid date format"}), 400)
+
+    if end_date < start_date:
+        return None, (jsonify({"error": "Invalid date range"}), 400)
+    if (end_date - start_date).days >= MAX_AVAILABILITY_DAYS:
+        error = f"Date range exceeds {MAX_AVAILABILITY_DAYS} days"
+        return None, (jsonify({"error": error}), 400)
+
+    return (start_date, end_date), None
+
+
+def build_availability(doctors, start_date, end_date):
+    # One range query covers every doctor; appointments just outside the
+    # range still block the first and last slots
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    booked = {doctor.id: [] for doctor in doctors}
+    rows = (
+        Appointment.query.with_entities(Appointment.doctor_id, Appointment.datetime)
+        .filter(
+            Appointment.doctor_id.in_(list(booked)),
+            Appointment.datetime > range_start - APPOINTMENT_DURATION,
+            Appointment.datetime < range_end + APPOINTMENT_DURATION,
+        )
+        .order_by(Appointment.doctor_id, Appointment.datetime)
+        .all()
+    )
+    for doctor_id, appointment_datetime in rows:
+        booked[doctor_id].append(appointment_datetime)
+
+    return [
+        {
+            "doctor_id": doctor.id,
+            "slots": [
+                slot.isoformat()
+                for slot in compute_open_slots(
+                    doctor, booked[doctor.id], start_date, end_date
+                )
+            ],
+        }
+        for doctor in doctors
+    ]
+
+
+@query_budget(2)
+def get_doctor_availability(doctor_id):
+    date_range, error = parse_availability_range()
+    if error:
+        return error
+
+    doctor = Doctor.query.get(doctor_id)
+    if not doctor:
+        return jsonify({"error": "Doctor not found"}), 404
+
+    availability = build_availability([doctor], *date_range)
+    return jsonify(availability[0]), 200
+
+
+@query_budget(2)
+def get_doctors_availability():
+    date_range, error = parse_availability_range()
+    if error:
+        return error
+
+    doctors_query = Doctor.query
+    doctor_ids_str = request.args.get("doctor_ids")
+    if doctor_ids_str:
+        try:
+            doctor_ids = [int(doctor_id) for doctor_id in doctor_ids_str.split(",")]
+        except ValueError:
+            return jsonify({"error": "Invalid doctor_ids"}), 400
+        doctors_query = doctors_query.filter(Doctor.id.in_(doctor_ids))
+
+    doctors = doctors_query.order_by(Doctor.id).all()
+    return jsonify(build_availability(doctors, *date_range)), 200
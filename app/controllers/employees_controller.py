@@ -1,18 +1,54 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
+from concurrent.futures import TimeoutError as HashTimeoutError
 from flask_login import login_user, logout_user
 from datetime import datetime
 from app.db.db import db
 from app.models.employee import Employee
+from app.utils.auth import principal_cache
+from app.utils.etags import (
+    PRECONDITION_FAILED,
+    precondition_failed,
+    row_conditional_get,
+    row_precondition,
+    table_conditional_get,
+)
+from app.utils.tokens import (
+    get_bearer_token,
+    issue_token,
+    load_token_claims,
+    token_denylist,
+)
+from app.utils.fields import get_requested_fields
+from app.utils.passwords import HASH_BUSY_ERROR
+from app.utils.query_budget import query_budget
+from app.utils.serializers import serializers
+from app.utils.streaming import stream_ndjson, wants_stream
 from flask_login import login_required
 
 
+def authenticate(username, password):
+    employee = Employee.query.filter_by(username=username).first()
+    if not employee or not employee.check_password(password):
+        return None
+
+    # Upgrade hashes made with outdated parameters while the password is known
+    if employee.password_needs_rehash():
+        employee.password = password
+        db.session.commit()
+    return employee
+
+
+@query_budget(4)
 def login():
     data = request.get_json()
     username = data.get("username")
     password = data.get("password")
-    employee = Employee.query.filter_by(username=username).first()
+    try:
+        employee = authenticate(username, password)
+    except HashTimeoutError:
+        return jsonify({"error": "Too many login attempts, try again later"}), 503
 
-    if employee and employee.check_password(password):
+    if employee:
         login_user(employee)
         return jsonify({"message": "Login successfully"}), 200
     else:
@@ -24,6 +60,41 @@ def logout():
     return jsonify({"message": "Logged out successfully"}), 200
 
 
+@query_budget(4)
+def create_token():
+    data = request.get_json()
+    username = data.get("username")
+    password = data.get("password")
+    try:
+        employee = authenticate(username, password)
+    except HashTimeoutError:
+        return jsonify({"error": "Too many login attempts, try again later"}), 503
+
+    if employee:
+        return (
+            jsonify(
+                {
+                    "access_token": issue_token(employee),
+                    "token_type": "Bearer",
+                    "expires_in": current_app.config.get("AUTH_TOKEN_TTL", 900),
+                }
+            ),
+            200,
+        )
+    else:
+        return jsonify({"error": "Invalid credential"}), 401
+
+
+def revoke_token():
+    claims = load_token_claims(get_bearer_token(request) or "")
+    if claims is None:
+        return jsonify({"error": "Invalid token"}), 401
+
+    token_denylist.revoke(claims["jti"], current_app.config.get("AUTH_TOKEN_TTL", 900))
+    return jsonify({"message": "Token revoked successfully"}), 200
+
+
+@query_budget(3)
 def create_employee():
     data = request.get_json()
     name = data.get("name")
@@ -46,49 +117,68 @@ def create_employee():
         return jsonify({"error": "Username already exists"}), 400
 
     # Create and save the new employee
-    new_employee = Employee(
-        name=name,
-        username=username,
-        password=password,
-        gender=gender,
-        birthdate=birthdate,
-    )
+    try:
+        new_employee = Employee(
+            name=name,
+            username=username,
+            password=password,
+            gender=gender,
+            birthdate=birthdate,
+        )
+    except HashTimeoutError:
+        return jsonify({"error": HASH_BUSY_ERROR}), 503
     db.session.add(new_employee)
     db.session.commit()
 
     return jsonify({"message": "Employee created successfully"}), 201
 
 
+EMPLOYEE_FIELDS = [
+    "id",
+    "name",
+    "username",
+    "gender",
+    "birthdate",
+]
+
+
+employee_serializer = serializers.register(Employee, EMPLOYEE_FIELDS)
+
+
+@query_budget(2)
+@row_conditional_get(Employee)
 def get_employee(employee_id):
-    employee = Employee.query.get(employee_id)
+    try:
+        fields = get_requested_fields(EMPLOYEE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    employee = (
+        employee_serializer.query(fields).filter(Employee.id == employee_id).first()
+    )
     if not employee:
         return jsonify({"error": "Employee not found"}), 404
 
-    employee_data = {
-        "id": employee.id,
-        "name": employee.name,
-        "username": employee.username,
-        "gender": employee.gender,
-        "birthdate": employee.birthdate.isoformat(),
-    }
-    return jsonify(employee_data), 200
+    return jsonify(employee_serializer.dump(employee, fields)), 200
 
 
+@query_budget(2)
+@table_conditional_get(Employee)
 def get_all_employees():
-    employees = Employee.query.all()
-    employees_data = [
-        {
-            "id": employee.id,
-            "name": employee.name,
-            "username": employee.username,
-            "gender": employee.gender,
-            "birthdate": employee.birthdate.isoformat(),
-        }
-        for employee in employees
-    ]
-    return jsonify(employees_data), 200
+    try:
+        fields = get_requested_fields(EMPLOYEE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    query = employee_serializer.query(fields).order_by(Employee.id)
+    if wants_stream():
+        return stream_ndjson(query, employee_serializer.compile(fields))
 
+    return jsonify(employee_serializer.dump_all(query, fields)), 200
+
+
+@query_budget(5)
+@row_precondition(Employee)
 def update_employee(employee_id):
     data = request.get_json()
     name = data.get("name")
@@ -100,6 +190,8 @@ def update_employee(employee_id):
     employee = Employee.query.get(employee_id)
     if not employee:
         return jsonify({"error": "Employee not found"}), 404
+    if precondition_failed(employee):
+        return jsonify(PRECONDITION_FAILED), 412
 
     try:
         if birthdate_str:
@@ -115,14 +207,24 @@ def update_employee(employee_id):
             return jsonify({"error": "Username already exists"}), 400
         employee.username = username
     if password_default:
-        employee.password = password_default
+        try:
+            employee.password = password_default
+        except HashTimeoutError:
+            db.session.rollback()
+            return jsonify({"error": HASH_BUSY_ERROR}), 503
     if gender:
         employee.gender = gender
 
     db.session.commit()
+    principal_cache.delete(str(employee_id))
+    if password_default:
+        token_denylist.revoke_subject(
+            employee_id, current_app.config.get("AUTH_TOKEN_TTL", 900)
+        )
     return jsonify({"message": "Employee updated successfully"}), 200
 
 
+@query_budget(3)
 def delete_employee(employee_id):
     employee = Employee.query.get(employee_id)
     if not employee:
@@ -130,4 +232,8 @@ def delete_employee(employee_id):
 
     db.session.delete(employee)
     db.session.commit()
+    principal_cache.delete(str(employee_id))
+    token_denylist.revoke_subject(
+        employee_id, current_app.config.get("AUTH_TOKEN_TTL", 900)
+    )
     return jsonify({"message": "Employee deleted successfully"}), 200
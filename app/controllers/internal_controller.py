@@ -0,0 +1,26 @@
+from flask import current_app, jsonify
+from app.db.db import db
+from app.utils.auth import principal_cache
+from app.utils.db_pool import get_binds, get_pool_stats
+from app.utils.response_cache import response_cache
+from app.utils.slow_queries import slow_query_log
+
+
+def get_auth_cache_stats():
+    return jsonify(principal_cache.stats()), 200
+
+
+def get_db_pool_stats():
+    stats = {}
+    for bind in get_binds(current_app):
+        engine = db.get_engine(current_app, bind)
+        stats[bind or "default"] = get_pool_stats(engine.pool)
+    return jsonify(stats), 200
+
+
+def get_response_cache_stats():
+    return jsonify(response_cache.stats()), 200
+
+
+def get_slow_queries():
+    return jsonify(slow_query_log.recent()), 200
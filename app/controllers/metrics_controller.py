@@ -0,0 +1,11 @@
+from flask import current_app
+from app.utils.metrics import request_metrics
+
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def get_metrics():
+    return current_app.response_class(
+        request_metrics.render(), content_type=PROMETHEUS_MIMETYPE
+    ), 200
@@ -1,10 +1,30 @@
-from flask import request, jsonify
-from google.cloud import bigquery
+from flask import request, jsonify, current_app
+from sqlalchemy.dialects import postgresql
 from app.db.db import db
 from app.models.patient import Patient
-from datetime import datetime
+from app.models.sync_state import SyncState
+from app.models.table_version import mark_tables_changed
+from app.utils.etags import (
+    PRECONDITION_FAILED,
+    precondition_failed,
+    row_conditional_get,
+    row_precondition,
+    table_conditional_get,
+)
+from app.utils.fields import get_requested_fields, load_fields
+from app.utils.query_budget import query_budget
+from app.utils.serializers import serializers
+from app.utils.streaming import stream_ndjson, wants_stream
+from app.utils.sync_pipeline import ChunkPipeline
+from datetime import datetime, timezone
 
 
+def is_sync_placeholder(patient):
+    """Whether the patient was created by the BigQuery sync and never registered."""
+    return not patient.gender and not patient.address
+
+
+@query_budget(3)
 def create_patient():
     data = request.get_json()
     name = data.get("name")
@@ -24,9 +44,19 @@ def create_patient():
     except ValueError:
         return jsonify({"error": "Invalid date format"}), 400
 
-    if Patient.query.filter_by(no_ktp=no_ktp).first():
+    existing_patient = Patient.query.filter_by(no_ktp=no_ktp).first()
+    if existing_patient and not is_sync_placeholder(existing_patient):
         return jsonify({"error": "Patient with this KTP already exists"}), 400
 
+    if existing_patient:
+        # Complete the row the BigQuery sync created; its vaccine data is kept
+        existing_patient.name = name
+        existing_patient.gender = gender
+        existing_patient.birthdate = birthdate
+        existing_patient.address = address
+        db.session.commit()
+        return jsonify({"message": "Patient created successfully"}), 201
+
     new_patient = Patient(
         name=name,
         gender=gender,
@@ -39,47 +69,60 @@ def create_patient():
     return jsonify({"message": "Patient created successfully"}), 201
 
 
+PATIENT_FIELDS = [
+    "id",
+    "name",
+    "gender",
+    "birthdate",
+    "no_ktp",
+    "address",
+    "vaccine_type",
+    "vaccine_count",
+]
+
+
+patient_serializer = serializers.register(Patient, PATIENT_FIELDS)
+
+
+@query_budget(2)
+@row_conditional_get(Patient)
 def get_patient(patient_id):
-    patient = Patient.query.get(patient_id)
+    try:
+        fields = get_requested_fields(PATIENT_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    patient = patient_serializer.query(fields).filter(Patient.id == patient_id).first()
     if not patient:
         return jsonify({"error": "Patient not found"}), 404
 
-    patient_data = {
-        "id": patient.id,
-        "name": patient.name,
-        "gender": patient.gender,
-        "birthdate": patient.birthdate.isoformat(),
-        "no_ktp": patient.no_ktp,
-        "address": patient.address,
-        "vaccine_type": patient.vaccine_type,
-        "vaccine_count": patient.vaccine_count,
-    }
-    return jsonify(patient_data), 200
+    return jsonify(patient_serializer.dump(patient, fields)), 200
 
 
+@query_budget(2)
+@table_conditional_get(Patient)
 def get_all_patients():
-    patients = Patient.query.all()
-    patients_data = [
-        {
-             "id": patient.id,
-            "name": patient.name,
-            "gender": patient.gender,
-            "birthdate": patient.birthdate.isoformat(),
-            "no_ktp": patient.no_ktp,
-            "address": patient.address,
-            "vaccine_type": patient.vaccine_type,
-            "vaccine_count": patient.vaccine_count,
-        }
-        for patient in patients
-    ]
-    return jsonify(patients_data), 200
+    try:
+        fields = get_requested_fields(PATIENT_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    query = patient_serializer.query(fields).order_by(Patient.id)
+    if wants_stream():
+        return stream_ndjson(query, patient_serializer.compile(fields))
 
+    return jsonify(patient_serializer.dump_all(query, fields)), 200
+
+
+@query_budget(4)
+@row_precondition(Patient)
 def update_patient(patient_id):
     data = request.get_json()
     patient = Patient.query.get(patient_id)
     if not patient:
         return jsonify({"error": "Patient not found"}), 404
+    if precondition_failed(patient):
+        return jsonify(PRECONDITION_FAILED), 412
 
     name = data.get("name")
     gender = data.get("gender")
@@ -108,6 +151,7 @@ def update_patient(patient_id):
     return jsonify({"message": "Patient updated successfully"}), 200
 
 
+@query_budget(3)
 def delete_patient(patient_id):
     patient = Patient.query.get(patient_id)
     if not patient:
@@ -118,34 +162,227 @@ def delete_patient(patient_id):
     return jsonify({"message": "Patient deleted successfully"}), 200
 
 
-def update_patients_from_bigquery():
-    client = bigquery.Client()
+VACCINE_DATA_TABLE = "`delman-internal.delman_interview.vaccine_data`"
 
-    query = """
-    SELECT no_ktp, vaccine_type, COUNT(vaccine_type) as vaccine_count
-    FROM `delman-internal.delman_interview.vaccine_data`
-    GROUP BY no_ktp, vaccine_type
-    """
-    query_job = client.query(query)
-    results = query_job.result()
-
-    for row in results:
-        patient = Patient.query.filter_by(no_ktp=row.no_ktp).with_for_update().first()
-        if patient:
-            patient.name = row.full_name
-            patient.birthdate = row.birthdate
-            patient.vaccine_status = row.vaccine_status
-            patient.vaccine_count = row.vaccine_count
-            db.session.commit()
-        else:
-            new_patient = Patient(
-                no_ktp=row.no_ktp,
-                name=row.full_name,
-                birthdate=row.birthdate,
-                vaccine_status=row.vaccine_status,
-                vaccine_count=row.vaccine_count,
+# Name of the SyncState row holding the BigQuery sync watermark
+PATIENT_SYNC_NAME = "bigquery_patients"
+
+# Columns the BigQuery sync writes on existing patients
+SYNC_COLUMNS = ["name", "birthdate", "vaccine_type", "vaccine_count"]
+
+
+def upsert_patients_postgresql(rows):
+    table = Patient.__table__
+    statement = postgresql.insert(table).values(rows)
+    excluded = statement.excluded
+    current_values = db.tuple_(*[table.c[column] for column in SYNC_COLUMNS])
+    new_values = db.tuple_(*[excluded[column] for column in SYNC_COLUMNS])
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.no_ktp],
+        set_={
+            **{column: excluded[column] for column in SYNC_COLUMNS},
+            "version": table.c.version + 1,
+        },
+        # Rows whose data did not change are neither written nor returned
+        where=current_values.is_distinct_from(new_values),
+    ).returning(db.literal_column("(xmax = 0)").label("inserted"))
+
+    written = db.session.execute(statement).fetchall()
+    inserted = sum(1 for row in written if row.inserted)
+    return inserted, len(written) - inserted, len(rows) - len(written)
+
+
+def upsert_patients_generic(rows):
+    existing = {
+        patient.no_ktp: patient
+        for patient in load_fields(
+            Patient.query, ["no_ktp", "version"] + SYNC_COLUMNS
+        ).filter(Patient.no_ktp.in_([row["no_ktp"] for row in rows]))
+    }
+    inserts = []
+    updates = []
+    for row in rows:
+        patient = existing.get(row["no_ktp"])
+        if patient is None:
+            inserts.append(row)
+        elif any(getattr(patient, column) != row[column] for column in SYNC_COLUMNS):
+            updates.append(
+                {
+                    "id": patient.id,
+                    # The current version; the ORM checks and increments it
+                    "version": patient.version,
+                    **{column: row[column] for column in SYNC_COLUMNS},
+                }
             )
-            db.session.add(new_patient)
-            db.session.commit()
 
-    print("Patients data updated successfully from BigQuery.")
+    db.session.bulk_insert_mappings(Patient, inserts)
+    db.session.bulk_update_mappings(Patient, updates)
+    return len(inserts), len(updates), len(rows) - len(inserts) - len(updates)
+
+
+def upsert_patients(rows):
+    """
+    Insert or update a chunk of patients keyed by no_ktp.
+
+    On Postgres this is a single INSERT ... ON CONFLICT (no_ktp) DO UPDATE
+    statement; other databases use one lookup plus bulk insert and update.
+
+    Args:
+        rows: Patient column dicts with unique no_ktp values.
+
+    Returns:
+        A tuple of (inserted, updated, unchanged) row counts.
+    """
+    if db.engine.dialect.name == "postgresql":
+        counts = upsert_patients_postgresql(rows)
+    else:
+        counts = upsert_patients_generic(rows)
+    inserted, updated, _ = counts
+    if inserted or updated:
+        mark_tables_changed(db.session, [Patient.__tablename__])
+    return counts
+
+
+def build_vaccine_data_query(incremental):
+    """
+    Build the BigQuery query aggregating vaccine data per KTP and type.
+
+    An incremental query only re-aggregates the KTPs that have rows
+    ingested after the @watermark parameter.
+    """
+    watermark_column = current_app.config.get(
+        "BIGQUERY_SYNC_WATERMARK_COLUMN", "ingested_at"
+    )
+    where = ""
+    if incremental:
+        where = (
+            f"WHERE no_ktp IN (SELECT no_ktp FROM {VACCINE_DATA_TABLE} "
+            f"WHERE {watermark_column} > @watermark)"
+        )
+
+    # Exactly one row per KTP: the vaccine type ingested last, ties broken by
+    # name, with the name and birthdate of its latest row. Any other choice
+    # would vary between runs and rewrite unchanged patients.
+    return f"""
+    SELECT no_ktp, full_name, birthdate, vaccine_type, vaccine_count, ingested_at
+    FROM (
+        SELECT no_ktp,
+            ARRAY_AGG(full_name ORDER BY {watermark_column} DESC LIMIT 1)[OFFSET(0)]
+                AS full_name,
+            ARRAY_AGG(birthdate ORDER BY {watermark_column} DESC LIMIT 1)[OFFSET(0)]
+                AS birthdate,
+            vaccine_type, COUNT(vaccine_type) AS vaccine_count,
+            MAX({watermark_column}) AS ingested_at
+        FROM {VACCINE_DATA_TABLE}
+        {where}
+        GROUP BY no_ktp, vaccine_type
+    )
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY no_ktp ORDER BY ingested_at DESC, vaccine_type
+    ) = 1
+    """
+
+
+def to_naive_utc(value):
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def update_patients_from_bigquery(client=None, full=False):
+    """
+    Sync patients' vaccine data from BigQuery.
+
+    By default only KTPs with vaccine rows ingested after the stored
+    watermark are fetched; the first run, or ``full=True``, re-reads the
+    whole table.
+
+    Args:
+        client: The BigQuery client, a new one when not given.
+        full: Whether to ignore the watermark and resync every patient.
+
+    Returns:
+        A dict of inserted, updated and unchanged patient counts.
+    """
+    # Imported here so web workers do not load the BigQuery client stack
+    from google.cloud import bigquery
+
+    client = client or bigquery.Client()
+
+    sync_state = SyncState.query.get(PATIENT_SYNC_NAME)
+    if not sync_state:
+        sync_state = SyncState(PATIENT_SYNC_NAME)
+        db.session.add(sync_state)
+    incremental = not full and sync_state.watermark is not None
+
+    job_config = None
+    if incremental:
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter(
+                    "watermark", "TIMESTAMP", sync_state.watermark
+                )
+            ]
+        )
+    query_job = client.query(build_vaccine_data_query(incremental), job_config=job_config)
+    # Rows are fetched page by page while the writers upsert earlier chunks
+    results = query_job.result(
+        page_size=current_app.config.get("BIGQUERY_SYNC_PAGE_SIZE", 10000)
+    )
+
+    watermark = sync_state.watermark
+    # Do not hold a transaction open while the writers run
+    db.session.commit()
+
+    def patient_rows():
+        nonlocal watermark
+        for row in results:
+            if row.ingested_at is not None:
+                ingested_at = to_naive_utc(row.ingested_at)
+                if watermark is None or ingested_at > watermark:
+                    watermark = ingested_at
+            yield {
+                "no_ktp": row.no_ktp,
+                "name": row.full_name,
+                "birthdate": row.birthdate,
+                "vaccine_type": row.vaccine_type,
+                "vaccine_count": row.vaccine_count,
+                # Not provided by BigQuery; create_patient fills them in when
+                # the patient registers with the same KTP
+                "gender": "",
+                "address": "",
+            }
+
+    # SQLite serializes writes, so concurrent writers would only contend
+    writers = current_app.config.get("BIGQUERY_SYNC_WRITERS", 4)
+    if db.engine.dialect.name == "sqlite":
+        writers = 1
+    pipeline = ChunkPipeline(
+        current_app._get_current_object(),
+        upsert_patients,
+        chunk_size=current_app.config.get("BIGQUERY_SYNC_CHUNK_SIZE", 1000),
+        queue_depth=current_app.config.get("BIGQUERY_SYNC_QUEUE_DEPTH", 4),
+        writers=writers,
+    )
+    # Each no_ktp always lands on the same writer, so the last row of a KTP wins
+    chunk_counts = pipeline.run(patient_rows(), key="no_ktp")
+    counts = {
+        "inserted": sum(inserted for inserted, _, _ in chunk_counts),
+        "updated": sum(updated for _, updated, _ in chunk_counts),
+        "unchanged": sum(unchanged for _, _, unchanged in chunk_counts),
+    }
+
+    # The watermark only moves once every chunk is committed, so a failed
+    # run is retried from the previous watermark
+    sync_state.watermark = watermark
+    sync_state.last_synced_at = datetime.utcnow()
+    db.session.commit()
+
+    print(
+        "Patients data updated successfully from BigQuery "
+        f"({'incremental' if incremental else 'full'}): "
+        f"{counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged."
+    )
+    return counts
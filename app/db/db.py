@@ -1,6 +1,29 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask import g, has_app_context
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
-db = SQLAlchemy(model_class=Base)
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session sending the reads of requests flagged by the read replica
+    router to the replica bind. Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_app_context() and g.get("use_read_replica") and not self._flushing:
+            return db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy(model_class=Base)
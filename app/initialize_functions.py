@@ -1,16 +1,36 @@
+import click
 from flask import Flask
 from flask_login import LoginManager
-from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
 from app.modules.main.route import main_bp
 from app.db.db import db
 from app.controllers.patients_controller import update_patients_from_bigquery
 from app.models.employee import Employee
+from app.utils.appointment_index import appointment_index
+from app.utils.auth import Principal, principal_cache
+from app.utils.json_encoders import get_json_encoder
+from app.utils.leader_lease import LeaderLease
+from app.utils.metrics import (
+    finish_request,
+    record_status,
+    request_metrics,
+    start_request,
+)
+from app.utils.read_replica import mark_primary_reads, reset_route, route_request
+from app.utils.response_cache import response_cache
+from app.utils.slow_queries import slow_query_log
+from app.utils.tokens import get_bearer_token, load_principal_from_token
 from app.routes.patients import patients_bp
 from app.routes.doctors import doctors_bp
 from app.routes.employees import employees_bp
 from app.routes.appointments import appointments_bp
 from app.routes.auth import auth_bp
+from app.routes.internal import internal_bp
+from app.routes.metrics import metrics_bp
+
+
+# Name of the lease row electing the process that runs scheduled jobs
+SCHEDULER_LEASE_NAME = "scheduler"
 
 
 def initialize_route(app: Flask):
@@ -21,12 +41,49 @@ def initialize_route(app: Flask):
         app.register_blueprint(patients_bp, url_prefix="/patients")
         app.register_blueprint(doctors_bp, url_prefix="/doctors")
         app.register_blueprint(employees_bp, url_prefix="/employees")
+        app.register_blueprint(internal_bp, url_prefix="/internal")
+        if app.config.get("METRICS_ENABLED", True):
+            app.register_blueprint(metrics_bp, url_prefix="/metrics")
 
 
 def initialize_db(app: Flask):
     with app.app_context():
         db.init_app(app)
-        db.create_all()
+        if app.config.get("DB_CREATE_ALL", False):
+            db.create_all()
+
+
+def initialize_metrics(app: Flask):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    request_metrics.init_app(app)
+    # Registered first so the measurement covers every other hook
+    app.before_request(start_request)
+    app.after_request(record_status)
+    app.teardown_request(finish_request)
+
+
+def initialize_slow_query_log(app: Flask):
+    slow_query_log.init_app(app)
+
+
+def initialize_json(app: Flask):
+    app.json_encoder = get_json_encoder(app.config.get("JSON_PROVIDER", "orjson"))
+
+
+def initialize_read_replica(app: Flask):
+    app.before_request(route_request)
+    app.after_request(mark_primary_reads)
+    app.teardown_request(reset_route)
+
+
+def initialize_appointment_index(app: Flask):
+    appointment_index.ttl = app.config.get("APPOINTMENT_INDEX_TTL", 60)
+    appointment_index.invalidate()
+
+
+def initialize_response_cache(app: Flask):
+    response_cache.init_app(app)
 
 
 def initialize_auth(app: Flask):
@@ -34,21 +91,105 @@ def initialize_auth(app: Flask):
         login_manager = LoginManager()
         login_manager.init_app(app)
 
+        principal_cache.maxsize = app.config.get("AUTH_CACHE_SIZE", 1024)
+        principal_cache.ttl = app.config.get("AUTH_CACHE_TTL", 300)
+
         @login_manager.user_loader
         def load_user(user_id):
-            return Employee.query.get(str(user_id))
+            principal = principal_cache.get(user_id)
+            if principal is None:
+                employee = Employee.query.get(str(user_id))
+                if not employee:
+                    return None
+                principal = Principal.from_employee(employee)
+                principal_cache.set(user_id, principal)
+            return principal
 
+        @login_manager.request_loader
+        def load_user_from_request(request):
+            # Bearer tokens are verified from their signature alone
+            token = get_bearer_token(request)
+            if token:
+                return load_principal_from_token(token)
+            return None
 
-def start_scheduler(app):
+
+def initialize_commands(app: Flask):
+    @app.cli.command("init-db")
+    def init_db():
+        """Create the tables that do not exist yet."""
+        db.create_all()
+        print("Database tables created.")
+
+    @app.cli.command("sync-patients")
+    @click.option(
+        "--full", is_flag=True, help="Ignore the watermark and resync every patient."
+    )
+    def sync_patients(full):
+        """Sync patients' vaccine data from BigQuery."""
+        update_patients_from_bigquery(full=full)
+
+    @app.cli.command("scheduler")
+    def scheduler():
+        """Run scheduled jobs in the foreground."""
+        from apscheduler.schedulers.blocking import BlockingScheduler
+
+        blocking_scheduler = BlockingScheduler()
+        lease = add_scheduled_jobs(app, blocking_scheduler)
+        try:
+            blocking_scheduler.start()
+        finally:
+            release_lease(app, lease)
+
+
+def run_scheduled_job(app: Flask, lease, func=None):
+    with app.app_context():
+        try:
+            # Every process renews or contends for the lease, but only the
+            # one holding it runs the job
+            if lease.try_acquire() and func:
+                func()
+        finally:
+            db.session.remove()
+
+
+def add_scheduled_jobs(app: Flask, scheduler):
+    lease = LeaderLease(
+        SCHEDULER_LEASE_NAME, ttl=app.config.get("SCHEDULER_LEASE_TTL", 60)
+    )
+    scheduler.add_job(
+        func=run_scheduled_job,
+        args=(app, lease),
+        trigger="interval",
+        seconds=max(lease.ttl // 3, 1),
+    )
+    scheduler.add_job(
+        func=run_scheduled_job,
+        args=(app, lease, update_patients_from_bigquery),
+        trigger="cron",
+        hour=0,
+        minute=0,
+    )
+    return lease
+
+
+def release_lease(app: Flask, lease):
     with app.app_context():
-        scheduler = BackgroundScheduler()
-        scheduler.add_job(
-            func=update_patients_from_bigquery,
-            trigger="cron",
-            hour=0,
-            minute=0,
-        )
-        scheduler.start()
-
-        # Shut down the scheduler when exiting the app
-        atexit.register(scheduler.shutdown)
+        try:
+            lease.release()
+        except Exception:
+            # The lease expires on its own if the database is unreachable
+            pass
+
+
+def start_scheduler(app: Flask):
+    # Imported here so processes that do not run jobs skip apscheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler()
+    lease = add_scheduled_jobs(app, scheduler)
+    scheduler.start()
+
+    # Shut down the scheduler when exiting the app
+    atexit.register(release_lease, app, lease)
+    atexit.register(scheduler.shutdown)
@@ -1,17 +1,34 @@
+from sqlalchemy import DDL, event
 from app.db.db import db
 from app.models.doctor import Doctor
+from datetime import timedelta
+
+
+# Minimum gap between two appointments of the same doctor
+APPOINTMENT_DURATION = timedelta(minutes=30)
 
 
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        db.Index("ix_appointments_doctor_id_datetime", "doctor_id", "datetime"),
+        db.Index("ix_appointments_patient_id_datetime", "patient_id", "datetime"),
+        db.Index("ix_appointments_status_datetime", "status", "datetime"),
+        db.Index("ix_appointments_datetime_id", "datetime", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey("patients.id"), nullable=False)
     doctor_id = db.Column(db.Integer, db.ForeignKey("doctors.id"), nullable=False)
     datetime = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(20), nullable=False, default="IN_QUEUE")
-    diagnose = db.Column(db.Text, default="")
-    notes = db.Column(db.Text, default="")
+    # Large free-text columns are only loaded when they are accessed
+    diagnose = db.deferred(db.Column(db.Text, default=""))
+    notes = db.deferred(db.Column(db.Text, default=""))
+
+    # Row version checked by the ORM on update and served as the ETag
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     def __init__(self, patient_id, doctor_id, datetime, status):
         self.patient_id = patient_id
@@ -40,3 +57,26 @@ class Appointment(db.Model):
 
     def __repr__(self):
         return f"<Appointment {self.id} with Doctor {self.doctor_id}>"
+
+
+# On Postgres the booking window is enforced by the database itself: no two
+# appointments of the same doctor may start less than APPOINTMENT_DURATION
+# apart, which is what overlapping [datetime, datetime + duration) ranges mean.
+BOOKING_WINDOW_CONSTRAINT = "appointments_doctor_booking_window_excl"
+
+event.listen(
+    Appointment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(
+        dialect="postgresql"
+    ),
+)
+event.listen(
+    Appointment.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE appointments ADD CONSTRAINT {BOOKING_WINDOW_CONSTRAINT} "
+        "EXCLUDE USING gist (doctor_id WITH =, tsrange(datetime, datetime + "
+        f"interval '{int(APPOINTMENT_DURATION.total_seconds())} seconds') WITH &&)"
+    ).execute_if(dialect="postgresql"),
+)
@@ -1,5 +1,5 @@
 from app.db.db import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import hash_password, needs_rehash, verify_password
 
 
 class Doctor(db.Model):
@@ -14,6 +14,10 @@ class Doctor(db.Model):
     work_start_time = db.Column(db.Time, nullable=False)
     work_end_time = db.Column(db.Time, nullable=False)
 
+    # Row version backing ETags and optimistic concurrency
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
     # appointments = db.relationship('Appointment', backref='doctor', lazy=True)
 
     def __init__(
@@ -40,10 +44,13 @@ class Doctor(db.Model):
 
     @password.setter
     def password(self, password):
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self._password_hash, password)
+        return verify_password(self._password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self._password_hash)
 
     def __repr__(self):
         return f"<Doctor {self.username}>"
@@ -1,5 +1,5 @@
 from app.db.db import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import hash_password, needs_rehash, verify_password
 from flask_login import UserMixin
 
 
@@ -13,6 +13,10 @@ class Employee(db.Model):
     gender = db.Column(db.String(10), nullable=False)
     birthdate = db.Column(db.Date, nullable=False)
 
+    # Row version, see Patient.version
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
     def __init__(self, name, username, password, gender, birthdate):
         self.name = name
         self.username = username
@@ -26,10 +30,13 @@ class Employee(db.Model):
 
     @password.setter
     def password(self, password):
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self._password_hash, password)
+        return verify_password(self._password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self._password_hash)
 
     def is_active(self):
         return True
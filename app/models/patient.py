@@ -8,11 +8,16 @@ class Patient(db.Model):
     name = db.Column(db.String(100), nullable=False)
     gender = db.Column(db.String(10), nullable=False)
     birthdate = db.Column(db.Date, nullable=False)
-    no_ktp = db.Column(db.String(16), nullable=False)
+    no_ktp = db.Column(db.String(16), nullable=False, unique=True, index=True)
     address = db.Column(db.String(100), nullable=False)
     vaccine_type = db.Column(db.String(100), nullable=True)
     vaccine_count = db.Column(db.Integer, nullable=True)
 
+    # Bumped on every ORM update, which also checks it to detect concurrent
+    # writes; exposed to clients through ETags
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
     # appointments = db.relationship('Appointment', backref='patient', lazy=True)
 
     def __init__(self, name, gender, birthdate, no_ktp, address):
@@ -0,0 +1,17 @@
+from app.db.db import db
+
+
+class SchedulerLease(db.Model):
+    __tablename__ = "scheduler_leases"
+
+    name = db.Column(db.String(100), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, name, holder, expires_at):
+        self.name = name
+        self.holder = holder
+        self.expires_at = expires_at
+
+    def __repr__(self):
+        return f"<SchedulerLease {self.name} held by {self.holder}>"
@@ -0,0 +1,15 @@
+from app.db.db import db
+
+
+class SyncState(db.Model):
+    __tablename__ = "sync_states"
+
+    name = db.Column(db.String(100), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)
+    last_synced_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<SyncState {self.name} at {self.watermark}>"
@@ -0,0 +1,103 @@
+from itertools import chain
+
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event
+from app.db.db import RoutingSession, db
+
+
+# Tables whose writes bump their change counter, used for collection ETags
+VERSIONED_TABLES = ("appointments", "doctors", "employees", "patients")
+
+# Session.info key of the tables written in the current transaction
+CHANGED_TABLES_KEY = "changed_tables"
+
+
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __init__(self, name, version=0):
+        self.name = name
+        self.version = version
+
+    def __repr__(self):
+        return f"<TableVersion {self.name} {self.version}>"
+
+
+def bump_table_versions(connection, names):
+    """
+    Increment the change counters of tables.
+
+    Counters are updated in name order so concurrent writers lock them in
+    the same order.
+    """
+    table = TableVersion.__table__
+    for name in sorted(set(names)):
+        result = connection.execute(
+            table.update()
+            .where(table.c.name == name)
+            .values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, version=1))
+
+
+def mark_tables_changed(session, names):
+    """
+    Record tables written in the session's transaction.
+
+    Their counters are bumped once the transaction commits. Writes that
+    bypass the ORM flush, such as bulk inserts and upserts, must call this
+    themselves.
+    """
+    session.info.setdefault(CHANGED_TABLES_KEY, set()).update(names)
+
+
+def get_table_version(name):
+    version = db.session.query(TableVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def seed_table_versions(target, connection, **kw):
+    # Counter rows exist up front, so writers only ever update them
+    connection.execute(
+        target.insert(), [{"name": name, "version": 0} for name in VERSIONED_TABLES]
+    )
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def record_flushed_tables(session, flush_context):
+    written = chain(
+        session.new,
+        session.deleted,
+        (obj for obj in session.dirty if session.is_modified(obj)),
+    )
+    names = {
+        getattr(obj, "__tablename__", None) for obj in written
+    } & set(VERSIONED_TABLES)
+    if names:
+        mark_tables_changed(session, names)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def bump_committed_table_versions(session):
+    # Bumping in a short transaction of its own after the commit keeps the
+    # shared counter rows from being locked for the length of every write
+    # transaction. A reader may briefly get new data under the old ETag,
+    # which only costs it one refetch once the counter moves.
+    names = session.info.pop(CHANGED_TABLES_KEY, None)
+    if names:
+        # Always the primary, even while reads are routed to the replica
+        engine = SignallingSession.get_bind(session, mapper=TableVersion.__mapper__)
+        with engine.begin() as connection:
+            bump_table_versions(connection, names)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def forget_changed_tables(session, transaction):
+    # Tables of a rolled back transaction were not changed after all
+    if transaction.parent is None:
+        session.info.pop(CHANGED_TABLES_KEY, None)
@@ -2,6 +2,7 @@ from flask import Blueprint
 from flask_login import login_required
 from app.controllers.appointments_controller import (
     create_appointment,
+    create_appointments_bulk,
     get_appointment,
     get_all_appointments,
     update_appointment,
@@ -17,6 +18,7 @@ def before_request():
     pass
 
 appointments_bp.route("", methods=["POST"])(create_appointment)
+appointments_bp.route("/bulk", methods=["POST"])(create_appointments_bulk)
 appointments_bp.route("", methods=["GET"])(get_all_appointments)
 appointments_bp.route("/<int:appointment_id>", methods=["GET"])(
     get_appointment
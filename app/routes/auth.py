@@ -1,8 +1,15 @@
 from flask import Blueprint
-from app.controllers.employees_controller import login, logout
+from app.controllers.employees_controller import (
+    login,
+    logout,
+    create_token,
+    revoke_token,
+)
 
 
 auth_bp = Blueprint("auth", __name__)
 
 auth_bp.route("/login", methods=["POST"])(login)
 auth_bp.route("/logout", methods=["POST"])(logout)
+auth_bp.route("/token", methods=["POST"])(create_token)
+auth_bp.route("/token/revoke", methods=["POST"])(revoke_token)
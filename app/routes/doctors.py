@@ -6,6 +6,8 @@ from app.controllers.doctors_controller import (
     get_all_doctors,
     update_doctor,
     delete_doctor,
+    get_doctor_availability,
+    get_doctors_availability,
 )
 
 
@@ -18,6 +20,10 @@ def before_request():
 
 doctors_bp.route("", methods=["POST"])(create_doctor)
 doctors_bp.route("", methods=["GET"])(get_all_doctors)
+doctors_bp.route("/availability", methods=["GET"])(get_doctors_availability)
 doctors_bp.route("/<int:doctor_id>", methods=["GET"])(get_doctor)
 doctors_bp.route("/<int:doctor_id>", methods=["PUT"])(update_doctor)
 doctors_bp.route("/<int:doctor_id>", methods=["DELETE"])(delete_doctor)
+doctors_bp.route("/<int:doctor_id>/availability", methods=["GET"])(
+    get_doctor_availability
+)
@@ -0,0 +1,21 @@
+from flask import Blueprint
+from flask_login import login_required
+from app.controllers.internal_controller import (
+    get_auth_cache_stats,
+    get_db_pool_stats,
+    get_response_cache_stats,
+    get_slow_queries,
+)
+
+
+internal_bp = Blueprint("internal", __name__)
+
+@internal_bp.before_request
+@login_required
+def before_request():
+    pass
+
+internal_bp.route("/auth-cache", methods=["GET"])(get_auth_cache_stats)
+internal_bp.route("/db-pool", methods=["GET"])(get_db_pool_stats)
+internal_bp.route("/response-cache", methods=["GET"])(get_response_cache_stats)
+internal_bp.route("/slow-queries", methods=["GET"])(get_slow_queries)
@@ -0,0 +1,9 @@
+from flask import Blueprint
+from app.controllers.metrics_controller import get_metrics
+
+
+# Scraped by Prometheus, so it is not behind the login; keep it off the
+# public load balancer
+metrics_bp = Blueprint("metrics", __name__)
+
+metrics_bp.route("", methods=["GET"])(get_metrics)
@@ -0,0 +1,46 @@
+import unittest
+from datetime import date, time
+
+from app.app import create_app
+from app.db.db import db
+from app.models.doctor import Doctor
+from app.models.employee import Employee
+from app.models.patient import Patient
+
+
+def make_patient(name="John Doe", no_ktp="1234567890123456", **columns):
+    values = {"gender": "Male", "birthdate": date(1990, 1, 1), "address": "123 Main St"}
+    values.update(columns)
+    return Patient(name=name, no_ktp=no_ktp, **values)
+
+
+def make_doctor(name="Jane Doe", username="janedoe", **columns):
+    values = {
+        "password": "password",
+        "gender": "Female",
+        "birthdate": date(1980, 1, 1),
+        "work_start_time": time(8, 0),
+        "work_end_time": time(17, 0),
+    }
+    values.update(columns)
+    return Doctor(name=name, username=username, **values)
+
+
+def make_employee(name="Test User", username="testuser", **columns):
+    values = {"password": "testpassword", "gender": "Male", "birthdate": date(1990, 1, 1)}
+    values.update(columns)
+    return Employee(name=name, username=username, **values)
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test in an app context on a fresh testing database."""
+
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
@@ -1,6 +1,17 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, PropertyMock, patch
 from app.app import create_app
+from app.controllers import appointments_controller
+from app.controllers.appointments_controller import (
+    booking_window_enforced_by_db,
+    create_appointment,
+    create_appointments_bulk,
+    get_all_appointments,
+    update_appointment,
+)
+from app.models.appointment import Appointment
+from app.db.db import db
+from app.tests.base import DatabaseTestCase, make_doctor, make_patient
 
 
 class MockFlaskClient:
@@ -151,5 +162,209 @@ class AppointmentControllerTestCase(unittest.TestCase):
         self.assertIn(b"Appointment not found", response.data)
 
 
+class AppointmentControllerDatabaseTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.add(make_patient())
+        db.session.add(make_doctor())
+        db.session.commit()
+
+    def post_appointment(self, datetime_str, patient_id=1):
+        payload = {
+            "patient_id": patient_id,
+            "doctor_id": 1,
+            "datetime": datetime_str,
+            "status": "IN_QUEUE",
+        }
+        with self.app.test_request_context(json=payload):
+            response, status_code = create_appointment()
+        return response, status_code
+
+    def test_create_appointment_within_booking_window(self):
+        _, status_code = self.post_appointment("2024-08-18 14:30:00")
+        self.assertEqual(status_code, 201)
+
+        response, status_code = self.post_appointment("2024-08-18 14:50:00")
+        self.assertEqual(status_code, 400)
+        self.assertIn(b"already booked", response.data)
+
+        _, status_code = self.post_appointment("2024-08-18 15:00:00")
+        self.assertEqual(status_code, 201)
+
+    def test_create_appointment_patient_not_found(self):
+        _, status_code = self.post_appointment("2024-08-18 14:30:00", patient_id=99)
+        self.assertEqual(status_code, 404)
+
+    def test_create_appointment_outside_working_hours(self):
+        response, status_code = self.post_appointment("2024-08-18 19:00:00")
+        self.assertEqual(status_code, 400)
+        self.assertIn(b"working hours", response.data)
+
+    def test_booking_window_enforced_only_with_constraint(self):
+        self.assertFalse(booking_window_enforced_by_db())
+
+        for found, expected in ((None, False), (1, True)):
+            engine = MagicMock()
+            engine.dialect.name = "postgresql"
+            engine.execute.return_value.scalar.return_value = found
+            with patch.object(
+                type(db), "engine", new_callable=PropertyMock, return_value=engine
+            ), patch.dict(appointments_controller._booking_window_enforced, clear=True):
+                self.assertEqual(booking_window_enforced_by_db(), expected)
+                self.assertEqual(booking_window_enforced_by_db(), expected)
+            self.assertEqual(engine.execute.call_count, 1)
+
+    def test_update_appointment(self):
+        self.post_appointment("2024-08-18 14:30:00")
+        payload = {"doctor_id": 1, "datetime": "2024-08-18 16:00:00"}
+        with self.app.test_request_context(json=payload):
+            _, status_code = update_appointment(1)
+        self.assertEqual(status_code, 200)
+
+    def test_update_appointment_within_booking_window(self):
+        self.post_appointment("2024-08-18 14:30:00")
+        self.post_appointment("2024-08-18 16:00:00")
+        payload = {"doctor_id": 1, "datetime": "2024-08-18 15:45:00"}
+        with self.app.test_request_context(json=payload):
+            response, status_code = update_appointment(1)
+        self.assertEqual(status_code, 400)
+        self.assertIn(b"already booked", response.data)
+
+        # Moving an appointment within its own window is not a conflict, and
+        # the same time on another day is free
+        for datetime_str in ("2024-08-18 14:45:00", "2024-08-19 16:00:00"):
+            payload = {"doctor_id": 1, "datetime": datetime_str}
+            with self.app.test_request_context(json=payload):
+                _, status_code = update_appointment(1)
+            self.assertEqual(status_code, 200)
+
+    def test_update_appointment_without_doctor_id(self):
+        self.post_appointment("2024-08-18 14:30:00")
+        self.post_appointment("2024-08-18 16:00:00")
+        with self.app.test_request_context(json={"datetime": "2024-08-18 16:10:00"}):
+            response, status_code = update_appointment(1)
+        self.assertEqual(status_code, 400)
+        self.assertIn(b"already booked", response.data)
+
+        with self.app.test_request_context(json={"datetime": "2024-08-18 10:00:00"}):
+            _, status_code = update_appointment(1)
+        self.assertEqual(status_code, 200)
+        appointment = Appointment.query.get(1)
+        self.assertEqual(appointment.doctor_id, 1)
+        self.assertEqual(appointment.datetime.hour, 10)
+
+    def test_update_appointment_moves_doctor(self):
+        db.session.add(make_doctor(name="Other Doctor", username="otherdoctor"))
+        db.session.commit()
+        self.post_appointment("2024-08-18 14:30:00")
+
+        with self.app.test_request_context(json={"doctor_id": 99}):
+            _, status_code = update_appointment(1)
+        self.assertEqual(status_code, 404)
+
+        with self.app.test_request_context(json={"doctor_id": 2}):
+            _, status_code = update_appointment(1)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(Appointment.query.get(1).doctor_id, 2)
+
+        # The first doctor is free again, the second one is now booked
+        _, status_code = self.post_appointment("2024-08-18 14:30:00")
+        self.assertEqual(status_code, 201)
+        payload = {"doctor_id": 2, "datetime": "2024-08-18 14:40:00"}
+        with self.app.test_request_context(json=payload):
+            _, status_code = update_appointment(2)
+        self.assertEqual(status_code, 400)
+
+    def test_create_appointments_bulk(self):
+        self.post_appointment("2024-08-18 14:30:00")
+        payload = [
+            {"patient_id": 1, "doctor_id": 1, "datetime": "2024-08-18 09:00:00"},
+            {"patient_id": 1, "doctor_id": 1, "datetime": "2024-08-18 09:15:00"},
+            {"patient_id": 1, "doctor_id": 1, "datetime": "2024-08-18 14:40:00"},
+            {"patient_id": 2, "doctor_id": 1, "datetime": "2024-08-18 11:00:00"},
+            {"patient_id": 1, "doctor_id": 2, "datetime": "2024-08-18 11:00:00"},
+            {"patient_id": 1, "doctor_id": 1, "datetime": "18-08-2024"},
+            {"patient_id": 1, "doctor_id": 1, "datetime": "2024-08-18 09:30:00"},
+        ]
+        with self.app.test_request_context(json=payload):
+            response, status_code = create_appointments_bulk()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.get_json()],
+            [201, 400, 400, 404, 404, 400, 201],
+        )
+        self.assertEqual(Appointment.query.count(), 3)
+
+    def test_create_appointments_bulk_many_doctors(self):
+        for number in range(2, 6):
+            db.session.add(
+                make_doctor(name=f"Doctor {number}", username=f"doctor{number}")
+            )
+        db.session.commit()
+        self.post_appointment("2024-08-18 10:00:00")
+
+        payload = [
+            {"patient_id": 1, "doctor_id": doctor_id, "datetime": datetime_str}
+            for doctor_id in range(1, 6)
+            for datetime_str in ("2024-08-18 10:10:00", "2024-08-19 11:00:00")
+        ]
+        with self.app.test_request_context(json=payload):
+            response, status_code = create_appointments_bulk()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.get_json()],
+            [400] + [201] * 9,
+        )
+        self.assertEqual(Appointment.query.count(), 10)
+
+    def test_get_all_appointments_keyset_pagination(self):
+        for datetime_str in (
+            "2024-08-18 09:00:00",
+            "2024-08-18 10:00:00",
+            "2024-08-18 11:00:00",
+            "2024-08-19 09:00:00",
+        ):
+            self.post_appointment(datetime_str)
+
+        url = "/appointments?limit=2&from=2024-08-18&to=2024-08-18"
+        with self.app.test_request_context(url):
+            response, status_code = get_all_appointments()
+        self.assertEqual(status_code, 200)
+        self.assertEqual([item["id"] for item in response.get_json()], [1, 2])
+        cursor = response.headers["X-Next-Cursor"]
+
+        url = f"/appointments?limit=2&from=2024-08-18&to=2024-08-18&cursor={cursor}"
+        with self.app.test_request_context(url):
+            response, status_code = get_all_appointments()
+        self.assertEqual([item["id"] for item in response.get_json()], [3])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_get_all_appointments_stream(self):
+        for datetime_str in ("2024-08-18 09:00:00", "2024-08-18 10:00:00"):
+            self.post_appointment(datetime_str)
+
+        with self.app.test_request_context("/appointments?stream=1&limit=1"):
+            response = get_all_appointments()
+            lines = response.get_data().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_get_all_appointments_fields(self):
+        self.post_appointment("2024-08-18 09:00:00")
+
+        with self.app.test_request_context("/appointments?fields=id,status"):
+            response, status_code = get_all_appointments()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response.get_json(), [{"id": 1, "status": "IN_QUEUE"}])
+
+        with self.app.test_request_context("/appointments?fields=id,password"):
+            _, status_code = get_all_appointments()
+        self.assertEqual(status_code, 400)
+
+    def test_get_all_appointments_invalid_filter(self):
+        with self.app.test_request_context("/appointments?doctor_id=abc"):
+            _, status_code = get_all_appointments()
+        self.assertEqual(status_code, 400)
+
+
 if __name__ == "__main__":
     unittest.main()
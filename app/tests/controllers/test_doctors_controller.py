@@ -1,6 +1,22 @@
+import json
 import unittest
+from datetime import datetime, time
 from unittest.mock import MagicMock
 from app.app import create_app
+from app.controllers.doctors_controller import (
+    DOCTORS_CACHE,
+    get_all_doctors,
+    get_doctor,
+    get_doctor_availability,
+    get_doctors_availability,
+    update_doctor,
+)
+from app.db.db import db
+from app.tests.base import DatabaseTestCase, make_doctor, make_patient
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.utils.query_budget import QueryBudget
+from app.utils.response_cache import response_cache
 
 
 class MockFlaskClient:
@@ -139,5 +155,133 @@ class DoctorControllerTestCase(unittest.TestCase):
         self.assertIn(b"Doctor not found", response.data)
 
 
+class DoctorAvailabilityTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.add(make_patient())
+        for username, work_end_time in (("first", time(10, 0)), ("second", time(9, 0))):
+            db.session.add(
+                make_doctor(name=username, username=username, work_end_time=work_end_time)
+            )
+        db.session.add(Appointment(1, 1, datetime(2024, 8, 18, 8, 45), "IN_QUEUE"))
+        db.session.commit()
+
+    def test_get_doctor_availability(self):
+        url = "/doctors/1/availability?from=2024-08-18&to=2024-08-19"
+        with self.app.test_request_context(url):
+            response, status_code = get_doctor_availability(1)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            json.loads(response.data)["slots"],
+            [
+                "2024-08-18T08:00:00",
+                "2024-08-18T09:30:00",
+                "2024-08-18T10:00:00",
+                "2024-08-19T08:00:00",
+                "2024-08-19T08:30:00",
+                "2024-08-19T09:00:00",
+                "2024-08-19T09:30:00",
+                "2024-08-19T10:00:00",
+            ],
+        )
+
+    def test_get_doctor_availability_invalid_range(self):
+        url = "/doctors/1/availability?from=2024-08-19&to=2024-08-18"
+        with self.app.test_request_context(url):
+            _, status_code = get_doctor_availability(1)
+        self.assertEqual(status_code, 400)
+
+    def test_get_doctors_availability(self):
+        url = "/doctors/availability?from=2024-08-18&to=2024-08-18&doctor_ids=2"
+        with self.app.test_request_context(url):
+            response, status_code = get_doctors_availability()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            json.loads(response.data),
+            [
+                {
+                    "doctor_id": 2,
+                    "slots": [
+                        "2024-08-18T08:00:00",
+                        "2024-08-18T08:30:00",
+                        "2024-08-18T09:00:00",
+                    ],
+                }
+            ],
+        )
+
+
+class DoctorResponseCacheTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.add(
+            make_doctor(name="Dr. Smith", username="smith", work_end_time=time(16, 0))
+        )
+        db.session.commit()
+
+    def get_names(self, url="/doctors"):
+        with self.app.test_request_context(url):
+            response, status_code = get_all_doctors()
+        self.assertEqual(status_code, 200)
+        return [doctor["name"] for doctor in json.loads(response.data)]
+
+    def rename_without_invalidation(self, name):
+        Doctor.query.get(1).name = name
+        db.session.commit()
+
+    def test_list_is_served_from_cache(self):
+        self.assertEqual(self.get_names(), ["Dr. Smith"])
+        self.rename_without_invalidation("Dr. Jones")
+        self.assertEqual(self.get_names(), ["Dr. Smith"])
+
+        stats = response_cache.stats()["namespaces"][DOCTORS_CACHE]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_query_strings_are_cached_separately(self):
+        self.get_names()
+        self.rename_without_invalidation("Dr. Jones")
+        self.assertEqual(self.get_names("/doctors?fields=id,name"), ["Dr. Jones"])
+
+    def test_update_invalidates_list_and_detail(self):
+        self.get_names()
+        with self.app.test_request_context("/doctors/1"):
+            get_doctor(1)
+        with self.app.test_request_context(
+            "/doctors/1", method="PUT", json={"name": "Dr. Jones"}
+        ):
+            _, status_code = update_doctor(1)
+        self.assertEqual(status_code, 200)
+
+        self.assertEqual(self.get_names(), ["Dr. Jones"])
+        with self.app.test_request_context("/doctors/1"):
+            response, _ = get_doctor(1)
+        self.assertEqual(json.loads(response.data)["name"], "Dr. Jones")
+
+    def test_cache_hit_answers_if_none_match(self):
+        with self.app.test_request_context("/doctors/1"):
+            response, _ = get_doctor(1)
+        headers = {"If-None-Match": response.headers["ETag"]}
+
+        with self.app.test_request_context("/doctors/1", headers=headers):
+            with QueryBudget(0):
+                response, status_code = get_doctor(1)
+        self.assertEqual(status_code, 304)
+        self.assertEqual(response.headers["ETag"], headers["If-None-Match"])
+
+        with self.app.test_request_context("/doctors/1"):
+            with QueryBudget(0):
+                response, status_code = get_doctor(1)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response.headers["ETag"], headers["If-None-Match"])
+
+    def test_not_found_is_not_cached(self):
+        with self.app.test_request_context("/doctors/2"):
+            _, status_code = get_doctor(2)
+        self.assertEqual(status_code, 404)
+        self.assertEqual(response_cache.backend.stats()["size"], 1)
+
+
 if __name__ == "__main__":
     unittest.main()
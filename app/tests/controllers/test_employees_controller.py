@@ -1,6 +1,12 @@
 import unittest
-from unittest.mock import MagicMock
+from concurrent.futures import TimeoutError
+from unittest.mock import MagicMock, patch
 from app.app import create_app
+from app.db.db import db
+from app.models.employee import Employee
+from app.tests.base import make_employee
+from app.utils.auth import principal_cache
+from app.utils.tokens import token_denylist
 
 
 class MockFlaskClient:
@@ -166,5 +172,109 @@ class EmployeeControllerTestCase(unittest.TestCase):
         self.assertIn(b"Employee not found", response.data)
 
 
+class EmployeeAuthCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config["SECRET_KEY"] = "test"
+        # Requests must not share an app context, or flask_login keeps the
+        # user on g between them
+        with self.app.app_context():
+            db.session.add(make_employee())
+            db.session.commit()
+        principal_cache.clear()
+        self.client = self.app.test_client()
+        self.client.post(
+            "/auth/login", json={"username": "testuser", "password": "testpassword"}
+        )
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_load_user_uses_cache(self):
+        misses = principal_cache.misses
+        hits = principal_cache.hits
+
+        self.assertEqual(self.client.get("/employees").status_code, 200)
+        self.assertEqual(self.client.get("/employees/1").status_code, 200)
+
+        self.assertEqual(principal_cache.misses - misses, 1)
+        self.assertEqual(principal_cache.hits - hits, 1)
+
+    def test_delete_employee_invalidates_cache(self):
+        self.client.get("/employees")
+        self.assertEqual(self.client.delete("/employees/1").status_code, 200)
+        self.assertEqual(self.client.get("/employees").status_code, 401)
+
+
+class EmployeeTokenTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config["SECRET_KEY"] = "test"
+        with self.app.app_context():
+            db.session.add(make_employee())
+            db.session.commit()
+        token_denylist.clear()
+        self.client = self.app.test_client()
+        response = self.client.post(
+            "/auth/token", json={"username": "testuser", "password": "testpassword"}
+        )
+        token = response.get_json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_create_token_invalid_credential(self):
+        response = self.client.post(
+            "/auth/token", json={"username": "testuser", "password": "wrongpassword"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_bearer_token_skips_user_loader(self):
+        misses = principal_cache.misses
+        response = self.client.get("/employees", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(principal_cache.misses, misses)
+
+    def test_invalid_bearer_token(self):
+        headers = {"Authorization": "Bearer invalid"}
+        self.assertEqual(self.client.get("/employees", headers=headers).status_code, 401)
+
+    def test_revoke_token(self):
+        response = self.client.post("/auth/token/revoke", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get("/employees", headers=self.headers).status_code, 401
+        )
+
+    def test_rehash_on_login(self):
+        self.app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+        response = self.client.post(
+            "/auth/token", json={"username": "testuser", "password": "testpassword"}
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            employee = Employee.query.get(1)
+            self.assertTrue(employee._password_hash.startswith("pbkdf2:sha256:2000$"))
+            self.assertFalse(employee.password_needs_rehash())
+
+    def test_password_change_times_out(self):
+        with patch("app.models.employee.hash_password", side_effect=TimeoutError):
+            response = self.client.put(
+                "/employees/1", json={"password": "newpassword"}, headers=self.headers
+            )
+        self.assertEqual(response.status_code, 503)
+        with self.app.app_context():
+            self.assertTrue(Employee.query.get(1).check_password("testpassword"))
+
+    def test_key_version_rotation(self):
+        self.app.config["AUTH_TOKEN_KEY_VERSION"] = 2
+        self.assertEqual(
+            self.client.get("/employees", headers=self.headers).status_code, 401
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
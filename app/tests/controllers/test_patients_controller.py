@@ -1,6 +1,20 @@
+import json
 import unittest
+from datetime import date, datetime
 from unittest.mock import MagicMock
 from app.app import create_app
+from app.controllers.patients_controller import (
+    create_patient,
+    get_all_patients,
+    get_patient,
+    update_patient,
+    update_patients_from_bigquery,
+)
+from app.db.db import db
+from app.models.patient import Patient
+from app.models.table_version import get_table_version
+from app.tests.base import DatabaseTestCase, make_patient
+from app.utils.fake_bigquery import FakeBigQueryClient
 
 
 class MockFlaskClient:
@@ -125,5 +139,220 @@ class PatientsBlueprintTestCase(unittest.TestCase):
         self.assertIn(b"Patient not found", response.data)
 
 
+class PatientsDatabaseTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(3):
+            db.session.add(make_patient(name=f"Patient {number}", no_ktp=f"{number:016d}"))
+        db.session.commit()
+
+    def test_get_all_patients_stream(self):
+        headers = {"Accept": "application/x-ndjson"}
+        with self.app.test_request_context("/patients", headers=headers):
+            response = get_all_patients()
+            lines = response.get_data().splitlines()
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(
+            [json.loads(line)["name"] for line in lines],
+            ["Patient 0", "Patient 1", "Patient 2"],
+        )
+
+    def test_get_all_patients_json(self):
+        with self.app.test_request_context("/patients"):
+            response, status_code = get_all_patients()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(len(response.get_json()), 3)
+
+    def test_update_patients_from_bigquery(self):
+        self.app.config["BIGQUERY_SYNC_CHUNK_SIZE"] = 2
+        client = FakeBigQueryClient(
+            [
+                self.vaccine_row(1, "Sinovac", datetime(2024, 1, 1)),
+                self.vaccine_row(1, "Sinovac", datetime(2024, 2, 1)),
+                self.vaccine_row(3, "Pfizer", datetime(2024, 1, 1)),
+            ]
+        )
+
+        counts = update_patients_from_bigquery(client)
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "unchanged": 0})
+        self.assertEqual(Patient.query.count(), 4)
+        patient = Patient.query.filter_by(no_ktp=f"{1:016d}").first()
+        self.assertEqual((patient.vaccine_type, patient.vaccine_count), ("Sinovac", 2))
+        self.assertEqual(patient.version, 2)
+
+    def test_create_patient_completes_synced_row(self):
+        update_patients_from_bigquery(
+            FakeBigQueryClient([self.vaccine_row(3, "Pfizer", datetime(2024, 1, 1))])
+        )
+        payload = {
+            "name": "Registered Patient",
+            "gender": "Female",
+            "birthdate": "1990-01-01",
+            "no_ktp": f"{3:016d}",
+            "address": "456 Side St",
+        }
+        with self.app.test_request_context(json=payload):
+            _, status_code = create_patient()
+        self.assertEqual(status_code, 201)
+        patient = Patient.query.filter_by(no_ktp=f"{3:016d}").one()
+        self.assertEqual(
+            (patient.name, patient.gender, patient.address, patient.vaccine_type),
+            ("Registered Patient", "Female", "456 Side St", "Pfizer"),
+        )
+
+        # Once registered, the KTP is taken
+        with self.app.test_request_context(json=payload):
+            response, status_code = create_patient()
+        self.assertEqual(status_code, 400)
+        self.assertIn(b"already exists", response.data)
+
+    def test_update_patients_from_bigquery_several_vaccine_types(self):
+        client = FakeBigQueryClient(
+            [
+                self.vaccine_row(1, "Sinovac", datetime(2024, 1, 1)),
+                self.vaccine_row(1, "Pfizer", datetime(2024, 3, 1)),
+                self.vaccine_row(1, "Sinovac", datetime(2024, 2, 1)),
+            ]
+        )
+
+        counts = update_patients_from_bigquery(client)
+        self.assertEqual(counts, {"inserted": 0, "updated": 1, "unchanged": 0})
+        patient = Patient.query.filter_by(no_ktp=f"{1:016d}").first()
+        self.assertEqual((patient.vaccine_type, patient.vaccine_count), ("Pfizer", 1))
+
+        # The same data does not rewrite the patient on the next run
+        counts = update_patients_from_bigquery(client, full=True)
+        self.assertEqual(counts, {"inserted": 0, "updated": 0, "unchanged": 1})
+
+    def test_update_patients_from_bigquery_incremental(self):
+        client = FakeBigQueryClient(
+            [
+                self.vaccine_row(1, "Sinovac", datetime(2024, 1, 1)),
+                self.vaccine_row(2, "Pfizer", datetime(2024, 1, 1)),
+            ]
+        )
+        update_patients_from_bigquery(client)
+
+        client.rows.append(self.vaccine_row(2, "Pfizer", datetime(2024, 3, 1)))
+        counts = update_patients_from_bigquery(client)
+
+        self.assertEqual(counts, {"inserted": 0, "updated": 1, "unchanged": 0})
+        self.assertEqual(client.queries[-1][1], {"watermark": datetime(2024, 1, 1)})
+        patient = Patient.query.filter_by(no_ktp=f"{2:016d}").first()
+        self.assertEqual(patient.vaccine_count, 2)
+
+        version = get_table_version("patients")
+        counts = update_patients_from_bigquery(client, full=True)
+        self.assertEqual(counts, {"inserted": 0, "updated": 0, "unchanged": 2})
+        self.assertEqual(get_table_version("patients"), version)
+
+    def test_get_patient_etag(self):
+        with self.app.test_request_context("/patients/1"):
+            response, status_code = get_patient(1)
+        self.assertEqual(status_code, 200)
+        etag = response.headers["ETag"]
+
+        headers = {"If-None-Match": etag}
+        with self.app.test_request_context("/patients/1", headers=headers):
+            response, status_code = get_patient(1)
+        self.assertEqual(status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+        Patient.query.get(1).name = "Renamed"
+        db.session.commit()
+        with self.app.test_request_context("/patients/1", headers=headers):
+            response, status_code = get_patient(1)
+        self.assertEqual(status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_get_all_patients_etag_changes_on_write(self):
+        with self.app.test_request_context("/patients"):
+            response, _ = get_all_patients()
+        headers = {"If-None-Match": response.headers["ETag"]}
+        with self.app.test_request_context("/patients", headers=headers):
+            _, status_code = get_all_patients()
+        self.assertEqual(status_code, 304)
+
+        db.session.delete(Patient.query.get(3))
+        db.session.commit()
+        with self.app.test_request_context("/patients", headers=headers):
+            response, status_code = get_all_patients()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+    def test_update_patient_if_match(self):
+        with self.app.test_request_context("/patients/1"):
+            response, _ = get_patient(1)
+        etag = response.headers["ETag"]
+
+        for if_match, expected_status in ((etag, 200), (etag, 412), ("*", 200)):
+            with self.app.test_request_context(
+                "/patients/1",
+                method="PUT",
+                headers={"If-Match": if_match},
+                json={"name": "Renamed"},
+            ):
+                _, status_code = update_patient(1)
+            self.assertEqual(status_code, expected_status)
+
+    def test_update_patient_if_match_after_concurrent_write(self):
+        with self.app.test_request_context("/patients/1"):
+            response, _ = get_patient(1)
+        # Another writer moves the row on after the client read it
+        table = Patient.__table__
+        db.session.bind.execute(
+            table.update().where(table.c.id == 1).values(version=table.c.version + 1)
+        )
+
+        with self.app.test_request_context(
+            "/patients/1",
+            method="PUT",
+            headers={"If-Match": response.headers["ETag"]},
+            json={"name": "Renamed"},
+        ):
+            _, status_code = update_patient(1)
+        self.assertEqual(status_code, 412)
+        db.session.remove()
+        patient = Patient.query.get(1)
+        self.assertEqual((patient.name, patient.version), ("Patient 0", 2))
+
+    def test_table_version_bumped_after_commit_only(self):
+        version = get_table_version("patients")
+        Patient.query.get(1).name = "Renamed"
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(get_table_version("patients"), version)
+
+        Patient.query.get(1).name = "Renamed"
+        db.session.commit()
+        self.assertEqual(get_table_version("patients"), version + 1)
+
+    def test_update_patient_concurrent_write(self):
+        def write_concurrently(session, *args):
+            # Another writer commits between the load and the update
+            table = Patient.__table__
+            db.session.bind.execute(
+                table.update().where(table.c.id == 1).values(version=table.c.version + 1)
+            )
+
+        with self.app.test_request_context(
+            "/patients/1", method="PUT", json={"name": "Renamed"}
+        ):
+            Patient.query.get(1)
+            db.event.listen(db.session(), "before_flush", write_concurrently)
+            _, status_code = update_patient(1)
+        self.assertEqual(status_code, 412)
+
+    @staticmethod
+    def vaccine_row(number, vaccine_type, ingested_at):
+        return {
+            "no_ktp": f"{number:016d}",
+            "full_name": f"Patient {number}",
+            "birthdate": date(1990, 1, 1),
+            "vaccine_type": vaccine_type,
+            "ingested_at": ingested_at,
+        }
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,133 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import sqlalchemy as sa
+from flask_migrate import Migrate, upgrade
+
+from app.app import create_app
+from app.db.db import db
+from app.models.appointment import Appointment
+from app.models.patient import Patient
+from app.models.table_version import get_table_version
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), "..", "..", "migrations")
+
+# Schema of a database created before any migration existed
+BASELINE_SCHEMA = [
+    """CREATE TABLE patients (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        gender VARCHAR(10) NOT NULL,
+        birthdate DATE NOT NULL,
+        no_ktp VARCHAR(16) NOT NULL,
+        address VARCHAR(100) NOT NULL,
+        vaccine_type VARCHAR(100),
+        vaccine_count INTEGER
+    )""",
+    """CREATE TABLE employees (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        username VARCHAR(100) NOT NULL UNIQUE,
+        password VARCHAR(128) NOT NULL,
+        gender VARCHAR(10) NOT NULL,
+        birthdate DATE NOT NULL
+    )""",
+    """CREATE TABLE doctors (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        username VARCHAR(100) NOT NULL UNIQUE,
+        password VARCHAR(128) NOT NULL,
+        gender VARCHAR(10) NOT NULL,
+        birthdate DATE NOT NULL,
+        work_start_time TIME NOT NULL,
+        work_end_time TIME NOT NULL
+    )""",
+    """CREATE TABLE appointments (
+        id INTEGER NOT NULL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES patients (id),
+        doctor_id INTEGER NOT NULL REFERENCES doctors (id),
+        datetime DATETIME NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        diagnose TEXT,
+        notes TEXT
+    )""",
+]
+
+
+class MigrationsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        Migrate(self.app, db, directory=MIGRATIONS)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # migrations/env.py loads alembic.ini's logging config, which would
+        # disable the loggers other tests assert on
+        file_config = patch("logging.config.fileConfig")
+        file_config.start()
+        self.addCleanup(file_config.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.execute("DROP TABLE IF EXISTS alembic_version")
+        self.app_context.pop()
+
+    def create_baseline(self):
+        db.drop_all()
+        for statement in BASELINE_SCHEMA:
+            db.engine.execute(statement)
+
+    def test_upgrade_baseline_database(self):
+        self.create_baseline()
+        db.engine.execute(
+            "INSERT INTO patients (name, gender, birthdate, no_ktp, address) "
+            "VALUES ('John Doe', 'Male', '1990-01-01', '1234567890123456', 'Main St')"
+        )
+
+        upgrade()
+
+        patient = Patient.query.one()
+        self.assertEqual(patient.version, 1)
+        self.assertEqual(get_table_version("patients"), 0)
+        patient.name = "Jane Doe"
+        db.session.commit()
+        self.assertEqual(patient.version, 2)
+
+    def test_upgrade_merges_duplicate_ktps(self):
+        self.create_baseline()
+        for name in ("First", "Second", "Other"):
+            no_ktp = "2" * 16 if name == "Other" else "1" * 16
+            db.engine.execute(
+                "INSERT INTO patients (name, gender, birthdate, no_ktp, address) "
+                f"VALUES ('{name}', 'Male', '1990-01-01', '{no_ktp}', 'Main St')"
+            )
+        db.engine.execute(
+            "INSERT INTO doctors (name, username, password, gender, birthdate, "
+            "work_start_time, work_end_time) VALUES ('Doctor', 'doctor', 'x', "
+            "'Female', '1980-01-01', '08:00:00.000000', '17:00:00.000000')"
+        )
+        db.engine.execute(
+            "INSERT INTO appointments (patient_id, doctor_id, datetime, status) "
+            "VALUES (2, 1, '2024-08-18 10:00:00.000000', 'IN_QUEUE')"
+        )
+
+        upgrade()
+
+        self.assertEqual(
+            [(patient.id, patient.name) for patient in Patient.query.order_by(Patient.id)],
+            [(1, "First"), (3, "Other")],
+        )
+        self.assertEqual(Appointment.query.one().patient_id, 1)
+        indexes = sa.inspect(db.engine).get_indexes("patients")
+        self.assertIn(
+            ["no_ktp"], [index["column_names"] for index in indexes if index["unique"]]
+        )
+
+    def test_upgrade_database_created_by_init_db(self):
+        upgrade()
+        self.assertEqual(get_table_version("patients"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
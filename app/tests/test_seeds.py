@@ -0,0 +1,68 @@
+import random
+import unittest
+from datetime import date
+
+from app.db.db import db
+from app.models.appointment import APPOINTMENT_DURATION, Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.table_version import get_table_version
+from app.tests.base import DatabaseTestCase
+from seeds.generate import KtpGenerator, generate, generate_patients
+
+
+class GenerateTestCase(DatabaseTestCase):
+    def test_ktps_are_unique_and_match_the_patient(self):
+        ktp = KtpGenerator(random.Random(0))
+        numbers = set()
+        for index in range(20000):
+            no_ktp, birthdate, female = ktp(index)
+            self.assertEqual(len(no_ktp), 16)
+            self.assertTrue(no_ktp.isdigit())
+            day = int(no_ktp[6:8]) - (40 if female else 0)
+            self.assertEqual(day, birthdate.day)
+            self.assertEqual(no_ktp[8:12], birthdate.strftime("%m%y"))
+            numbers.add(no_ktp)
+        self.assertEqual(len(numbers), 20000)
+
+    def test_same_seed_gives_same_rows(self):
+        self.assertEqual(
+            list(generate_patients(100, 1, seed=7)), list(generate_patients(100, 1, seed=7))
+        )
+        self.assertNotEqual(
+            list(generate_patients(100, 1, seed=7)), list(generate_patients(100, 1, seed=8))
+        )
+
+    def test_generate(self):
+        with db.engine.connect() as connection:
+            generate(connection, 200, 10, 1000, employees=2, chunk_size=300)
+
+        self.assertEqual(Patient.query.count(), 200)
+        self.assertEqual(Doctor.query.count(), 10)
+        self.assertEqual(Appointment.query.count(), 1000)
+        self.assertEqual(get_table_version("appointments"), 1)
+
+        doctors = {doctor.id: doctor for doctor in Doctor.query}
+        booked = {}
+        for appointment in Appointment.query.order_by(Appointment.datetime):
+            doctor = doctors[appointment.doctor_id]
+            time = appointment.datetime.time()
+            self.assertTrue(doctor.work_start_time <= time <= doctor.work_end_time)
+            self.assertTrue(1 <= appointment.patient_id <= 200)
+            previous = booked.get(doctor.id)
+            if previous:
+                self.assertGreaterEqual(appointment.datetime - previous, APPOINTMENT_DURATION)
+            booked[doctor.id] = appointment.datetime
+
+        # Appending a second dataset continues after the existing ids
+        with db.engine.connect() as connection:
+            generate(connection, 10, 1, 0, start_date=date(2030, 1, 1))
+        self.assertEqual(Patient.query.count(), 210)
+        self.assertEqual(db.session.query(db.func.max(Doctor.id)).scalar(), 11)
+        self.assertEqual(
+            db.session.query(db.func.count(db.distinct(Patient.no_ktp))).scalar(), 210
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
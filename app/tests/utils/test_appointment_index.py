@@ -0,0 +1,71 @@
+import unittest
+from datetime import date, datetime
+
+from app.utils.appointment_index import AppointmentIndex
+
+
+class AppointmentIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.appointments = {
+            1: [
+                (datetime(2024, 8, 18, 14, 30), 1),
+                (datetime(2024, 8, 18, 10, 0), 2),
+            ]
+        }
+
+        def loader(doctor_id, start, end):
+            self.loads.append(doctor_id)
+            return [
+                row for row in self.appointments.get(doctor_id, [])
+                if start <= row[0] < end
+            ]
+
+        self.index = AppointmentIndex(loader=loader, ttl=60)
+
+    def test_available_with_enough_gap(self):
+        self.assertTrue(self.index.is_available(1, datetime(2024, 8, 18, 15, 0)))
+        self.assertTrue(self.index.is_available(1, datetime(2024, 8, 18, 14, 0)))
+
+    def test_unavailable_within_gap(self):
+        self.assertFalse(self.index.is_available(1, datetime(2024, 8, 18, 14, 30)))
+        self.assertFalse(self.index.is_available(1, datetime(2024, 8, 18, 14, 45)))
+        self.assertFalse(self.index.is_available(1, datetime(2024, 8, 18, 9, 31)))
+
+    def test_exclude_id(self):
+        self.assertTrue(
+            self.index.is_available(1, datetime(2024, 8, 18, 14, 40), exclude_id=1)
+        )
+
+    def test_loads_once_per_doctor(self):
+        self.index.is_available(1, datetime(2024, 8, 18, 12, 0))
+        self.index.is_available(1, datetime(2024, 8, 18, 13, 0))
+        self.index.is_available(2, datetime(2024, 8, 18, 13, 0))
+        self.assertEqual(self.loads, [1, 2])
+
+    def test_loads_one_day_at_a_time(self):
+        self.appointments[1].append((datetime(2024, 8, 19, 0, 10), 3))
+        self.assertFalse(self.index.is_available(1, datetime(2024, 8, 18, 23, 50)))
+        self.assertTrue(self.index.is_available(1, datetime(2024, 8, 18, 23, 30)))
+        self.assertEqual(self.loads, [1])
+        self.assertEqual(
+            sorted(self.index._entries), [(1, date(2024, 8, 18))]
+        )
+        self.assertEqual(len(self.index._entries[(1, date(2024, 8, 18))]), 3)
+
+        self.assertTrue(self.index.is_available(1, datetime(2024, 8, 20, 10, 0)))
+        self.assertEqual(self.loads, [1, 1])
+
+    def test_add_and_invalidate(self):
+        self.index.is_available(1, datetime(2024, 8, 18, 12, 0))
+        self.index.add(1, datetime(2024, 8, 18, 12, 0), 3)
+        self.assertFalse(self.index.is_available(1, datetime(2024, 8, 18, 12, 10)))
+        self.assertEqual(self.loads, [1])
+
+        self.index.invalidate(1)
+        self.assertTrue(self.index.is_available(1, datetime(2024, 8, 18, 12, 10)))
+        self.assertEqual(self.loads, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, exc
+
+from app.app import create_app
+from app.controllers.internal_controller import get_db_pool_stats
+from app.utils.db_pool import (
+    InstrumentedQueuePool,
+    build_engine_options,
+    get_pool_stats,
+)
+
+
+class InstrumentedQueuePoolTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine(
+            f"sqlite:///{self.path}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_stats_track_checked_out_connections(self):
+        connection = self.engine.connect()
+        stats = get_pool_stats(self.engine.pool)
+        self.assertEqual(stats["pool"], "InstrumentedQueuePool")
+        self.assertEqual(stats["checked_out"], 1)
+        self.assertEqual(stats["idle"], 0)
+        self.assertEqual(stats["overflow"], 0)
+        self.assertEqual(stats["checkouts"], 1)
+
+        connection.close()
+        stats = get_pool_stats(self.engine.pool)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_stats_record_timeouts_and_wait_time(self):
+        connection = self.engine.connect()
+        with self.assertRaises(exc.TimeoutError):
+            self.engine.connect()
+        connection.close()
+
+        stats = get_pool_stats(self.engine.pool)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["wait_time_max"], 0.05)
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    def test_sqlite_keeps_default_pool(self):
+        self.assertEqual(build_engine_options("sqlite://", 5, 10, 30, 1800, True), {})
+
+    def test_server_database_uses_instrumented_pool(self):
+        options = build_engine_options(
+            "postgresql://user@localhost/hospital", 5, 10, 30, 1800, True
+        )
+        self.assertIs(options["poolclass"], InstrumentedQueuePool)
+        self.assertEqual(options["pool_size"], 5)
+        self.assertEqual(options["max_overflow"], 10)
+        self.assertEqual(options["pool_timeout"], 30)
+        self.assertEqual(options["pool_recycle"], 1800)
+        self.assertTrue(options["pool_pre_ping"])
+
+    def test_db_pool_stats_endpoint(self):
+        app = create_app("testing")
+        with app.test_request_context("/internal/db-pool"):
+            response, status = get_db_pool_stats()
+        self.assertEqual(status, 200)
+        self.assertEqual(response.get_json()["default"]["pool"], "StaticPool")
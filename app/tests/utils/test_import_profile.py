@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+from app.utils.import_profile import parse_import_times
+
+
+class ImportProfileTestCase(unittest.TestCase):
+    def test_parse_import_times(self):
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     werkzeug.urls",
+            "import time:       300 |       1500 |   flask",
+            "Traceback (most recent call last):",
+        ])
+        self.assertEqual(
+            parse_import_times(output),
+            [("flask", 300, 1500), ("werkzeug.urls", 120, 120)],
+        )
+
+    def test_boot_does_not_import_bigquery(self):
+        statement = (
+            "import sys; from app.app import create_app; create_app('testing'); "
+            "print('google.cloud.bigquery' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", statement], capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "False")
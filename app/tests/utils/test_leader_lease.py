@@ -0,0 +1,44 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app.db.db import db
+from app.models.scheduler_lease import SchedulerLease
+from app.tests.base import DatabaseTestCase
+from app.utils.leader_lease import LeaderLease
+
+
+class LeaderLeaseTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = LeaderLease("scheduler", ttl=60)
+        self.second = LeaderLease("scheduler", ttl=60)
+
+    def test_single_leader(self):
+        self.assertTrue(self.first.try_acquire())
+        self.assertFalse(self.second.try_acquire())
+        self.assertTrue(self.first.try_acquire())
+
+    def test_takeover_after_expiry(self):
+        self.assertTrue(self.first.try_acquire())
+        lease = SchedulerLease.query.get("scheduler")
+        lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        self.assertTrue(self.second.try_acquire())
+        self.assertFalse(self.first.try_acquire())
+
+    def test_expiry_uses_database_clock(self):
+        self.assertTrue(self.first.try_acquire())
+        # Lease times come from the database, in UTC
+        expires_at = SchedulerLease.query.get("scheduler").expires_at
+        remaining = expires_at - datetime.utcnow()
+        self.assertTrue(timedelta(seconds=58) <= remaining <= timedelta(seconds=61))
+
+    def test_release(self):
+        self.assertTrue(self.first.try_acquire())
+        self.first.release()
+        self.assertTrue(self.second.try_acquire())
+
+
+if __name__ == "__main__":
+    unittest.main()
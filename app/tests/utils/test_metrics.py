@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.app import create_app
+from app.utils.metrics import RequestMetrics, clear_multiproc_dir, request_metrics
+
+
+class RequestMetricsTestCase(unittest.TestCase):
+    def test_render_histogram(self):
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+        metrics.observe("/patients", "GET", 200, 0.05, 2, 0.01)
+        metrics.observe("/patients", "GET", 200, 0.5, 3, 0.02)
+        lines = metrics.render().splitlines()
+
+        labels = 'route="/patients",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="1.0"}} 2', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 2", lines)
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', lines)
+        self.assertIn(f"http_request_sql_statements_total{{{labels}}} 5", lines)
+
+    def test_metrics_endpoint(self):
+        app = create_app("testing")
+        request_metrics.clear()
+        client = app.test_client()
+        client.post("/auth/token", json={"username": "nobody", "password": "secret"})
+        client.get("/does-not-exist")
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertIn(
+            'http_requests_total{route="/auth/token",method="POST",status="401"} 1',
+            lines,
+        )
+        self.assertIn(
+            'http_request_sql_statements_total{route="/auth/token",method="POST"} 1',
+            lines,
+        )
+        self.assertIn(
+            'http_requests_total{route="unmatched",method="GET",status="404"} 1', lines
+        )
+
+
+    def test_workers_share_a_directory(self):
+        with tempfile.TemporaryDirectory() as path:
+            workers = []
+            for pid in (101, 102):
+                metrics = RequestMetrics(buckets=(0.1, 1.0), multiproc_dir=path)
+                with mock.patch("app.utils.metrics.os.getpid", return_value=pid):
+                    metrics.observe("/patients", "GET", 200, 0.05, 2, 0.01)
+                    metrics.observe("/patients", "GET", 404, 0.5, 1, 0.01)
+                    # Written at most once per interval, and when the worker exits
+                    metrics.flush()
+                workers.append(metrics)
+
+            with mock.patch("app.utils.metrics.os.getpid", return_value=101):
+                lines = workers[0].render().splitlines()
+            labels = 'route="/patients",method="GET"'
+            self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 2', lines)
+            self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 4", lines)
+            self.assertIn(f'http_requests_total{{{labels},status="404"}} 2', lines)
+            self.assertIn(f"http_request_sql_statements_total{{{labels}}} 6", lines)
+
+            clear_multiproc_dir(path)
+            self.assertEqual(os.listdir(path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
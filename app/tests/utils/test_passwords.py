@@ -0,0 +1,51 @@
+import threading
+import unittest
+from concurrent.futures import TimeoutError
+
+from app.app import create_app
+from app.utils import passwords
+
+
+class RunInPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config.update(
+            PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=2, PASSWORD_HASH_TIMEOUT=0.1
+        )
+        self.release = threading.Event()
+        self.ran = []
+        passwords._executor = None
+
+    def tearDown(self):
+        self.release.set()
+        passwords._executor.shutdown(wait=True)
+        passwords._executor = None
+
+    def block(self):
+        self.release.wait(5)
+
+    def test_timed_out_hash_is_cancelled(self):
+        with self.app.app_context():
+            with self.assertRaises(TimeoutError):
+                passwords.run_in_pool(self.block)
+            # Queued behind the blocked worker, then abandoned
+            with self.assertRaises(TimeoutError):
+                passwords.run_in_pool(self.ran.append, 1)
+            self.release.set()
+            self.assertEqual(passwords.run_in_pool(len, "ok"), 2)
+        self.assertEqual(self.ran, [])
+
+    def test_pending_hashes_are_bounded(self):
+        self.app.config["PASSWORD_HASH_MAX_PENDING"] = 1
+        with self.app.app_context():
+            with self.assertRaises(TimeoutError):
+                passwords.run_in_pool(self.block)
+            # The blocked hash still holds the only place, so nothing is queued
+            with self.assertRaises(TimeoutError):
+                passwords.run_in_pool(self.ran.append, 1)
+            self.assertEqual(passwords._executor._work_queue.qsize(), 0)
+        self.assertEqual(self.ran, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
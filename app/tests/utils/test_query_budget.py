@@ -0,0 +1,99 @@
+import unittest
+
+from flask import Response, stream_with_context
+
+from app.app import create_app
+from app.db.db import db
+from app.utils.query_budget import QueryBudget, QueryBudgetExceeded, query_budget
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def execute(self, times, statement="SELECT 1"):
+        for _ in range(times):
+            db.session.execute(statement)
+
+    def test_within_budget(self):
+        with QueryBudget(2) as budget:
+            self.execute(2)
+        self.assertEqual(budget.count, 2)
+
+    def test_over_budget_raises_in_testing(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, "2 SQL statements, budget is 1"):
+            with QueryBudget(1):
+                self.execute(1, "SELECT 1")
+                self.execute(1, "SELECT 2")
+
+    def test_repeated_statement_is_flagged(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, "likely N\\+1, executed 4 times"):
+            with QueryBudget(10):
+                self.execute(4)
+
+    def test_decorator_names_function(self):
+        @query_budget(0)
+        def list_things():
+            self.execute(1)
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, "list_things"):
+            list_things()
+
+    def test_log_mode(self):
+        self.app.config["QUERY_BUDGET_MODE"] = "log"
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            with QueryBudget(0, "listing"):
+                self.execute(1)
+        self.assertIn("Query budget of listing exceeded", logs.output[0])
+
+    def test_off_mode(self):
+        self.app.config["QUERY_BUDGET_MODE"] = "off"
+        with QueryBudget(0) as budget:
+            self.execute(1)
+        self.assertEqual(budget.count, 0)
+
+    def streaming_view(self, rows):
+        @query_budget(2)
+        def list_things():
+            self.execute(1, "SELECT 0")
+
+            def generate():
+                for row in range(rows):
+                    self.execute(1, f"SELECT {row + 1}")
+                    yield f"{row}\n"
+
+            return Response(stream_with_context(generate()))
+
+        return list_things
+
+    def test_stream_is_counted_until_exhausted(self):
+        with self.app.test_request_context():
+            response = self.streaming_view(1)()
+        self.assertEqual(response.get_data(), b"0\n")
+
+        with self.app.test_request_context():
+            response = self.streaming_view(2)()
+        with self.assertRaisesRegex(QueryBudgetExceeded, "3 SQL statements, budget is 2"):
+            response.get_data()
+
+    def test_stream_consumer_is_not_counted(self):
+        with self.app.test_request_context():
+            response = self.streaming_view(1)()
+        for _ in response.response:
+            self.execute(2, "SELECT 9")
+
+    def test_error_in_block_is_not_masked(self):
+        with self.assertRaises(ZeroDivisionError):
+            with QueryBudget(0):
+                self.execute(1)
+                1 / 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from app.app import create_app
+from app.db.db import REPLICA_BIND, db
+from app.models.patient import Patient
+from app.tests.base import make_employee, make_patient
+from app.utils.read_replica import READ_PRIMARY_COOKIE
+from app.utils.tokens import issue_token, token_denylist
+
+
+class ReadReplicaTestCase(unittest.TestCase):
+    def setUp(self):
+        # The in-memory testing database is the primary and a SQLite file
+        # stands in for the replica; replication never happens, so each
+        # holds a different version of patient 1
+        handle, self.replica_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.app = create_app("testing")
+        self.app.config["SECRET_KEY"] = "test"
+        self.app.config["SQLALCHEMY_BINDS"] = {
+            REPLICA_BIND: f"sqlite:///{self.replica_path}"
+        }
+        token_denylist.clear()
+        with self.app.app_context():
+            self.replica = db.get_engine(self.app, REPLICA_BIND)
+            db.Model.metadata.create_all(self.replica)
+            employee = make_employee()
+            db.session.add_all([employee, make_patient("Primary")])
+            db.session.commit()
+            token = issue_token(employee)
+
+            self.replica.execute(
+                Patient.__table__.insert(),
+                id=1,
+                name="Replica",
+                gender="Female",
+                birthdate=date(1990, 1, 1),
+                no_ktp="1234567890123456",
+                address="Jl. Merdeka",
+            )
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.replica.dispose()
+        os.remove(self.replica_path)
+
+    def get_patient_name(self):
+        response = self.client.get("/patients/1", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()["name"]
+
+    def create_patient(self):
+        return self.client.post(
+            "/patients",
+            headers=self.headers,
+            json={
+                "name": "New Patient",
+                "gender": "Male",
+                "birthdate": "1985-05-05",
+                "no_ktp": "6543210987654321",
+                "address": "Jl. Sudirman",
+            },
+        )
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.get_patient_name(), "Replica")
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.create_patient().status_code, 201)
+        with self.app.app_context():
+            self.assertIsNotNone(Patient.query.filter_by(no_ktp="6543210987654321").first())
+        count = db.select([db.func.count()]).select_from(Patient.__table__)
+        self.assertEqual(self.replica.execute(count).scalar(), 1)
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.create_patient()
+        self.assertIn(READ_PRIMARY_COOKIE, response.headers["Set-Cookie"])
+        self.assertEqual(self.get_patient_name(), "Primary")
+
+    def test_stickiness_expires(self):
+        self.client.set_cookie("localhost", READ_PRIMARY_COOKIE, "1")
+        self.assertEqual(self.get_patient_name(), "Replica")
+
+    def test_failed_write_does_not_stick(self):
+        response = self.client.post("/patients", headers=self.headers, json={})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("Set-Cookie", response.headers)
+        self.assertEqual(self.get_patient_name(), "Replica")
+
+    def test_without_replica_reads_go_to_primary(self):
+        self.app.config["SQLALCHEMY_BINDS"] = None
+        self.assertEqual(self.get_patient_name(), "Primary")
+
+
+if __name__ == "__main__":
+    unittest.main()
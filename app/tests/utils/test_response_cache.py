@@ -0,0 +1,67 @@
+import unittest
+
+from flask import Flask, jsonify
+
+from app.utils.cache import CacheBackend, LRUCache
+from app.utils.response_cache import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cache = ResponseCache(LRUCache(maxsize=16, ttl=60))
+        self.calls = 0
+
+    def view(self):
+        self.calls += 1
+        return jsonify({"calls": self.calls}), 200
+
+    def call(self, view, url="/items"):
+        with self.app.test_request_context(url):
+            response, _ = view()
+        return response.get_json()
+
+    def test_hit_skips_view(self):
+        view = self.cache.cached("items")(self.view)
+        self.assertEqual(self.call(view), {"calls": 1})
+        self.assertEqual(self.call(view), {"calls": 1})
+
+    def test_per_view_ttl(self):
+        view = self.cache.cached("items", ttl=0)(self.view)
+        self.call(view)
+        self.assertEqual(self.call(view), {"calls": 2})
+
+    def test_invalidate_only_drops_its_namespace(self):
+        items = self.cache.cached("items")(self.view)
+        others = self.cache.cached("others")(self.view)
+        self.call(items)
+        self.call(others, "/others")
+
+        self.cache.invalidate("items")
+        self.assertEqual(self.call(items), {"calls": 3})
+        self.assertEqual(self.call(others, "/others"), {"calls": 2})
+        self.assertEqual(self.cache.stats()["namespaces"]["items"]["invalidations"], 1)
+
+    def test_stream_requests_bypass_cache(self):
+        view = self.cache.cached("items")(self.view)
+        self.call(view)
+        self.assertEqual(self.call(view, "/items?stream=1"), {"calls": 2})
+
+    def test_disabled(self):
+        self.cache.enabled = False
+        view = self.cache.cached("items")(self.view)
+        self.call(view)
+        self.assertEqual(self.call(view), {"calls": 2})
+
+
+    def test_incomplete_backend_is_rejected(self):
+        class GetOnlyCache(CacheBackend):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnlyCache()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+from datetime import date, datetime, time
+
+from flask import Flask
+from flask import json as flask_json
+
+from app.app import create_app
+from app.db.db import db
+from app.models.doctor import Doctor
+from app.utils.json_encoders import IsoJSONEncoder, OrjsonEncoder, get_json_encoder
+from app.utils.serializers import SerializerRegistry
+
+
+class ModelSerializerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.session.add(
+            Doctor(
+                name="Dr. Smith",
+                username="smith",
+                password="password",
+                gender="Female",
+                birthdate=date(1980, 1, 1),
+                work_start_time=time(8, 0),
+                work_end_time=time(16, 0),
+            )
+        )
+        db.session.commit()
+        self.serializer = SerializerRegistry().register(
+            Doctor, ["id", "name", "work_start_time"]
+        )
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_rows_are_tuples(self):
+        row = self.serializer.query(["id", "name"]).first()
+        self.assertNotIsInstance(row, Doctor)
+        self.assertEqual(self.serializer.dump(row, ["id", "name"]), {"id": 1, "name": "Dr. Smith"})
+
+    def test_extra_columns_are_not_output(self):
+        rows = self.serializer.query(["name"], extra=["id"]).all()
+        self.assertEqual(rows[0].id, 1)
+        self.assertEqual(self.serializer.dump_all(rows, ["name"]), [{"name": "Dr. Smith"}])
+
+    def test_compiled_once_per_fields(self):
+        self.assertIs(self.serializer.compile(["id"]), self.serializer.compile(["id"]))
+
+
+class JSONEncoderTestCase(unittest.TestCase):
+    def encode(self, encoder, data):
+        app = Flask(__name__)
+        app.json_encoder = encoder
+        with app.app_context():
+            return flask_json.dumps(data)
+
+    def test_encoders_agree(self):
+        data = {
+            "b": datetime(2024, 8, 18, 8, 45),
+            "a": date(1990, 1, 1),
+            "c": [time(8, 0), None, 1.5, "é"],
+        }
+        stdlib = self.encode(IsoJSONEncoder, data)
+        fast = self.encode(OrjsonEncoder, data)
+        self.assertEqual(json.loads(stdlib), json.loads(fast))
+        self.assertEqual(
+            json.loads(fast),
+            {
+                "a": "1990-01-01",
+                "b": "2024-08-18T08:45:00",
+                "c": ["08:00:00", None, 1.5, "é"],
+            },
+        )
+        # Flask sorts keys by default
+        self.assertTrue(fast.startswith('{"a"'))
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            get_json_encoder("simplejson")
+
+
+if __name__ == "__main__":
+    unittest.main()
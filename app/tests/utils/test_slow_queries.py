@@ -0,0 +1,121 @@
+import unittest
+from unittest import mock
+
+from app.app import create_app
+from app.db.db import db
+from app.utils.slow_queries import explain, redact_plan, slow_query_log
+
+
+class FakeCursor:
+    def __init__(self, connection, fail=False):
+        self.connection = connection
+        self.fail = fail
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(statement)
+        if self.fail and statement.startswith("EXPLAIN"):
+            raise RuntimeError("boom")
+
+    def fetchall(self):
+        return [("Seq Scan on appointments",), ("Buffers: shared hit=1",)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, fail=False):
+        self.explain_cursor = FakeCursor(self, fail)
+
+    def cursor(self):
+        return self.explain_cursor
+
+
+class SlowQueryLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config["SLOW_QUERY_THRESHOLD"] = 1e-9
+        slow_query_log.init_app(self.app)
+
+    def tearDown(self):
+        slow_query_log.init_app(create_app("testing"))
+
+    def test_logs_statement_route_and_frame(self):
+        client = self.app.test_client()
+        with self.assertLogs("app.utils.slow_queries", level="WARNING"):
+            client.post("/auth/token", json={"username": "nobody", "password": "secret"})
+
+        entry = slow_query_log.recent()[0]
+        self.assertIn("FROM employees", entry["statement"])
+        self.assertIsNone(entry["parameters"])
+        self.assertEqual(entry["route"], "/auth/token")
+        self.assertEqual(entry["method"], "POST")
+        self.assertTrue(entry["frame"].startswith("app/"))
+        # SQLite is never explained
+        self.assertIsNone(entry["plan"])
+
+    def test_parameters_logged_when_enabled(self):
+        self.app.config["SLOW_QUERY_LOG_PARAMETERS"] = True
+        slow_query_log.init_app(self.app)
+        client = self.app.test_client()
+        with self.assertLogs("app.utils.slow_queries", level="WARNING") as logs:
+            client.post("/auth/token", json={"username": "nobody", "password": "secret"})
+
+        self.assertIn("nobody", slow_query_log.recent()[0]["parameters"])
+        self.assertIn("nobody", logs.output[0])
+
+    def test_parameters_not_logged_by_default(self):
+        client = self.app.test_client()
+        with self.assertLogs("app.utils.slow_queries", level="WARNING") as logs:
+            client.post("/auth/token", json={"username": "nobody", "password": "secret"})
+        self.assertNotIn("nobody", "".join(logs.output))
+
+    def test_redact_plan(self):
+        plan = "Index Scan using ix_patients_no_ktp\n  Index Cond: (no_ktp = '1234''5678'::text)"
+        self.assertEqual(
+            redact_plan(plan),
+            "Index Scan using ix_patients_no_ktp\n  Index Cond: (no_ktp = '?'::text)",
+        )
+
+    def test_below_threshold_is_not_logged(self):
+        self.app.config["SLOW_QUERY_THRESHOLD"] = 60
+        slow_query_log.init_app(self.app)
+        with self.app.app_context():
+            db.session.execute("SELECT 1")
+        self.assertEqual(slow_query_log.recent(), [])
+
+    def test_only_sampled_postgres_selects_are_explained(self):
+        postgres = mock.Mock()
+        postgres.dialect.name = "postgresql"
+        slow_query_log.explain_sample_rate = 1.0
+        self.assertTrue(slow_query_log.should_explain(postgres, " SELECT 1"))
+        self.assertFalse(slow_query_log.should_explain(postgres, "UPDATE patients SET name = 'x'"))
+        slow_query_log.explain_sample_rate = 0.0
+        self.assertFalse(slow_query_log.should_explain(postgres, "SELECT 1"))
+
+    def test_explain_runs_in_savepoint(self):
+        connection = FakeConnection()
+        plan = explain(FakeCursor(connection), "SELECT * FROM appointments", {})
+        self.assertEqual(plan, "Seq Scan on appointments\nBuffers: shared hit=1")
+        self.assertEqual(
+            connection.explain_cursor.statements,
+            [
+                "SAVEPOINT slow_query_explain",
+                "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM appointments",
+                "RELEASE SAVEPOINT slow_query_explain",
+            ],
+        )
+
+    def test_failed_explain_rolls_back_savepoint(self):
+        connection = FakeConnection(fail=True)
+        plan = explain(FakeCursor(connection), "SELECT 1", {})
+        self.assertEqual(plan, "EXPLAIN failed: boom")
+        self.assertIn(
+            "ROLLBACK TO SAVEPOINT slow_query_explain",
+            connection.explain_cursor.statements,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import unittest
+
+from app.app import create_app
+from app.utils.sync_pipeline import ChunkPipeline
+
+
+class ChunkPipelineTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app("testing")
+
+    def setUp(self):
+        self.chunks = []
+        self.threads = set()
+
+    def write_chunk(self, rows):
+        self.threads.add(threading.get_ident())
+        self.chunks.append(rows)
+        return len(rows)
+
+    def test_run_writes_every_row(self):
+        rows = ({"key": number % 50, "value": number} for number in range(1000))
+        pipeline = ChunkPipeline(
+            self.app, self.write_chunk, chunk_size=10, queue_depth=2, writers=3
+        )
+
+        results = pipeline.run(rows, key="key")
+
+        written = {row["key"]: row["value"] for chunk in self.chunks for row in chunk}
+        self.assertEqual(written, {key: 950 + key for key in range(50)})
+        self.assertEqual(sum(results), sum(len(chunk) for chunk in self.chunks))
+        self.assertTrue(all(len(chunk) <= 10 for chunk in self.chunks))
+        self.assertEqual(len(self.threads), 3)
+
+    def test_run_raises_writer_error(self):
+        def write_chunk(rows):
+            raise ValueError("write failed")
+
+        pipeline = ChunkPipeline(
+            self.app, write_chunk, chunk_size=1, queue_depth=1, writers=2
+        )
+        rows = ({"key": number} for number in range(100))
+
+        with self.assertRaises(ValueError):
+            pipeline.run(rows, key="key")
+
+
+if __name__ == "__main__":
+    unittest.main()
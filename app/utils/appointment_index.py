@@ -0,0 +1,128 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from app.models.appointment import Appointment, APPOINTMENT_DURATION
+
+
+def load_doctor_appointments(doctor_id, start, end):
+    """Load the (datetime, id) pairs of a doctor's appointments in [start, end)."""
+    return (
+        Appointment.query.with_entities(Appointment.datetime, Appointment.id)
+        .filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.datetime >= start,
+            Appointment.datetime < end,
+        )
+        .all()
+    )
+
+
+def day_window(day):
+    """
+    The range of start times loaded for one day: the day itself widened by
+    APPOINTMENT_DURATION on both sides, so bookings just across midnight
+    are seen by the gap check.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start - APPOINTMENT_DURATION, start + timedelta(days=1) + APPOINTMENT_DURATION
+
+
+class AppointmentIndex:
+    """
+    In-process, per-doctor and per-day sorted index of appointment start
+    times.
+
+    A doctor's bookings for a day are loaded with one bounded query the
+    first time that day is needed and then kept sorted, so the 30-minute
+    gap check is a bisect instead of two ordered queries. Entries expire
+    after ``ttl`` seconds so writes made by other worker processes are
+    picked up; expired days are dropped on the next load.
+    """
+
+    def __init__(self, loader=load_doctor_appointments, ttl=60):
+        self.loader = loader
+        self.ttl = ttl
+        self._entries = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+
+    def _get_entries(self, doctor_id, day):
+        key = (doctor_id, day)
+        now = time.monotonic()
+        with self._lock:
+            loaded_at = self._loaded_at.get(key)
+            if loaded_at is not None and now - loaded_at < self.ttl:
+                return self._entries[key]
+
+        entries = sorted(tuple(row) for row in self.loader(doctor_id, *day_window(day)))
+        with self._lock:
+            for expired in [
+                other for other, other_loaded_at in self._loaded_at.items()
+                if now - other_loaded_at >= self.ttl
+            ]:
+                self._entries.pop(expired, None)
+                self._loaded_at.pop(expired, None)
+            self._entries[key] = entries
+            self._loaded_at[key] = now
+        return entries
+
+    def is_available(self, doctor_id, appointment_datetime, exclude_id=None):
+        """
+        Check that no appointment of the doctor starts within
+        APPOINTMENT_DURATION of the given datetime.
+
+        Args:
+            doctor_id: The doctor to check.
+            appointment_datetime: The requested start time.
+            exclude_id: An appointment id to ignore, e.g. the one being updated.
+
+        Returns:
+            True if the slot is free, False otherwise.
+        """
+        entries = self._get_entries(doctor_id, appointment_datetime.date())
+        with self._lock:
+            position = bisect_left(entries, (appointment_datetime,))
+
+            previous_index = position - 1
+            while previous_index >= 0 and entries[previous_index][1] == exclude_id:
+                previous_index -= 1
+            if previous_index >= 0:
+                previous_datetime = entries[previous_index][0]
+                if appointment_datetime - previous_datetime < APPOINTMENT_DURATION:
+                    return False
+
+            next_index = position
+            while next_index < len(entries) and entries[next_index][1] == exclude_id:
+                next_index += 1
+            if next_index < len(entries):
+                next_datetime = entries[next_index][0]
+                if next_datetime - appointment_datetime < APPOINTMENT_DURATION:
+                    return False
+
+        return True
+
+    def add(self, doctor_id, appointment_datetime, appointment_id):
+        """Record a newly created appointment in the loaded days it falls in."""
+        day = appointment_datetime.date()
+        with self._lock:
+            for offset in (-1, 0, 1):
+                key = (doctor_id, day + timedelta(days=offset))
+                start, end = day_window(key[1])
+                if key in self._entries and start <= appointment_datetime < end:
+                    insort(self._entries[key], (appointment_datetime, appointment_id))
+
+    def invalidate(self, doctor_id=None):
+        """Drop one doctor's entries, or the whole index when no id is given."""
+        with self._lock:
+            if doctor_id is None:
+                self._entries.clear()
+                self._loaded_at.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == doctor_id]:
+                    self._entries.pop(key, None)
+                    self._loaded_at.pop(key, None)
+
+
+appointment_index = AppointmentIndex()
@@ -0,0 +1,31 @@
+from flask_login import UserMixin
+
+from app.utils.cache import LRUCache
+
+
+class Principal(UserMixin):
+    """
+    Snapshot of an authenticated employee kept between requests.
+
+    Unlike an Employee instance it is not bound to a session, so it can be
+    cached and shared by requests without touching the database.
+    """
+
+    def __init__(self, id, username, name):
+        self.id = id
+        self.username = username
+        self.name = name
+
+    @classmethod
+    def from_employee(cls, employee):
+        return cls(employee.id, employee.username, employee.name)
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f"<Principal {self.username}>"
+
+
+# Principals by user id, filled by the login manager's user loader
+principal_cache = LRUCache()
@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from app.models.appointment import APPOINTMENT_DURATION
+
+
+def is_slot_free(booked_datetimes, slot):
+    """
+    Check that no booked appointment starts less than APPOINTMENT_DURATION
+    away from the slot.
+
+    Args:
+        booked_datetimes: Sorted start datetimes of a doctor's appointments.
+        slot: The requested start datetime.
+
+    Returns:
+        True if the slot is free, False otherwise.
+    """
+    position = bisect_left(booked_datetimes, slot)
+    if position > 0 and slot - booked_datetimes[position - 1] < APPOINTMENT_DURATION:
+        return False
+    if (
+        position < len(booked_datetimes)
+        and booked_datetimes[position] - slot < APPOINTMENT_DURATION
+    ):
+        return False
+    return True
+
+
+def compute_open_slots(doctor, booked_datetimes, start_date, end_date):
+    """
+    Compute the open appointment slots of a doctor between two dates.
+
+    Slots start at the doctor's work_start_time and repeat every
+    APPOINTMENT_DURATION up to work_end_time (inclusive, like the booking
+    check). A slot is open when no booked appointment starts less than
+    APPOINTMENT_DURATION away from it.
+
+    Args:
+        doctor: The Doctor whose working hours define the slots.
+        booked_datetimes: Sorted start datetimes of the doctor's appointments.
+        start_date: First date to include.
+        end_date: Last date to include.
+
+    Returns:
+        A list of open slot datetimes in ascending order.
+    """
+    open_slots = []
+    day = start_date
+    while day <= end_date:
+        slot = datetime.combine(day, doctor.work_start_time)
+        work_end = datetime.combine(day, doctor.work_end_time)
+        while slot <= work_end:
+            if is_slot_free(booked_datetimes, slot):
+                open_slots.append(slot)
+            slot += APPOINTMENT_DURATION
+        day += timedelta(days=1)
+    return open_slots
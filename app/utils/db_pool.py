@@ -0,0 +1,115 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from app.db.db import db
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool recording how long checkouts wait for a connection.
+
+    Wait time covers taking a connection from the pool, waiting for one to
+    be returned and opening an overflow connection, so it grows when the
+    pool is exhausted or the database is slow to accept connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; only time the
+        # outermost call
+        if getattr(self._local, "timing", False):
+            return super()._do_get()
+
+        self._local.timing = True
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._local.timing = False
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_time += elapsed
+                self.max_wait_time = max(self.max_wait_time, elapsed)
+
+    def wait_stats(self):
+        with self._stats_lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total": self.wait_time,
+                "wait_time_avg": self.wait_time / self.checkouts if self.checkouts else 0.0,
+                "wait_time_max": self.max_wait_time,
+            }
+
+
+def build_engine_options(
+    database_uri, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping
+):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a database URI.
+
+    SQLite is left to Flask-SQLAlchemy, which picks a pool suited to
+    in-memory or file databases; the queue pool options do not apply to it.
+    """
+    if not database_uri or database_uri.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping,
+    }
+
+
+def get_binds(app):
+    return [None] + list(app.config.get("SQLALCHEMY_BINDS") or {})
+
+
+def get_pool_stats(pool):
+    """Describe the connections held by a pool."""
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # QueuePool counts overflow from -size until the pool is full
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            }
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
+
+
+def dispose_engines(app):
+    """
+    Drop the pooled connections of every engine of the app.
+
+    Called around a fork so a worker never shares a connection socket with
+    its parent; the pools reconnect lazily afterwards.
+    """
+    with app.app_context():
+        for bind in get_binds(app):
+            db.get_engine(app, bind).dispose()
@@ -0,0 +1,125 @@
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.db import db
+from app.models.table_version import get_table_version
+from app.utils.streaming import wants_stream
+
+
+PRECONDITION_FAILED = {"error": "Precondition failed"}
+
+
+def row_etag(model, row_id):
+    """
+    Build the ETag of a row from its version column.
+
+    Returns:
+        The ETag, or None if the row does not exist.
+    """
+    version = db.session.query(model.version).filter(model.id == row_id).scalar()
+    if version is None:
+        return None
+    return f"{model.__tablename__}-{row_id}-v{version}"
+
+
+def table_etag(model):
+    """Build the ETag of a collection from its table's change counter."""
+    return f"{model.__tablename__}-v{get_table_version(model.__tablename__)}"
+
+
+def get_row_id(args, kwargs):
+    # Views take the row id as their only argument, positionally when called
+    # directly and by keyword when dispatched by a route
+    return args[0] if args else next(iter(kwargs.values()))
+
+
+def conditional_get(compute_etag):
+    """
+    Answer GET requests whose If-None-Match holds the current ETag with a
+    304 before running the view, and tag 200 responses with the ETag.
+
+    Args:
+        compute_etag: Callable taking the view arguments and returning the
+            current ETag, or None to run the view unconditionally.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = compute_etag(*args, **kwargs)
+            if etag is None:
+                return view(*args, **kwargs)
+            # The NDJSON and JSON representations differ byte for byte
+            if wants_stream():
+                etag = f"{etag}-ndjson"
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response, 304
+
+            result = view(*args, **kwargs)
+            # Streaming views return the response alone
+            if isinstance(result, tuple):
+                response, status = result
+            else:
+                response, status = result, result.status_code
+            if status == 200:
+                response.set_etag(etag)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def table_conditional_get(model):
+    """conditional_get for a collection view of a model."""
+    return conditional_get(lambda *args, **kwargs: table_etag(model))
+
+
+def row_conditional_get(model):
+    """conditional_get for a view of a single row of a model."""
+    return conditional_get(
+        lambda *args, **kwargs: row_etag(model, get_row_id(args, kwargs))
+    )
+
+
+def precondition_failed(instance):
+    """
+    Whether an If-Match header rules out writing a row.
+
+    The header is compared with the version of the instance the view has
+    loaded and is about to update, never with a separate read, so the
+    version column check at flush covers every change committed after this
+    comparison.
+    """
+    if "If-Match" not in request.headers:
+        return False
+    etag = f"{instance.__tablename__}-{instance.id}-v{instance.version}"
+    return not request.if_match.contains(etag)
+
+
+def row_precondition(model):
+    """
+    Turn a concurrent write detected by the version column into a 412.
+
+    Views pass the row they load to precondition_failed to honour If-Match;
+    a row changed between that load and the write fails at flush with
+    StaleDataError, which is answered here.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                return view(*args, **kwargs)
+            except StaleDataError:
+                db.session.rollback()
+                return jsonify(PRECONDITION_FAILED), 412
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+class FakeQueryJob:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def result(self, page_size=None):
+        return iter(self.rows)
+
+
+class FakeBigQueryClient:
+    """
+    Offline stand-in for ``bigquery.Client`` serving the vaccine data sync.
+
+    It holds raw ``vaccine_data`` rows and answers the sync query in
+    Python: rows are aggregated per KTP and vaccine type, and the type
+    ingested last is kept for each KTP, honouring the ``@watermark``
+    parameter of incremental queries. Timestamps are naive
+    UTC. Every query is recorded in ``queries`` for assertions.
+
+    Args:
+        rows: Dicts with no_ktp, full_name, birthdate, vaccine_type and
+            ingested_at keys.
+    """
+
+    def __init__(self, rows=None):
+        self.rows = list(rows or [])
+        self.queries = []
+
+    def query(self, query, job_config=None):
+        parameters = {}
+        for parameter in getattr(job_config, "query_parameters", None) or []:
+            value = parameter.value
+            # Timestamps come back from the job config as aware UTC datetimes
+            if isinstance(value, datetime) and value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            parameters[parameter.name] = value
+        self.queries.append((query, parameters))
+
+        rows = self.rows
+        watermark = parameters.get("watermark")
+        if watermark is not None:
+            changed = {row["no_ktp"] for row in rows if row["ingested_at"] > watermark}
+            rows = [row for row in rows if row["no_ktp"] in changed]
+
+        groups = {}
+        for row in rows:
+            key = (row["no_ktp"], row["vaccine_type"])
+            group = groups.setdefault(
+                key,
+                SimpleNamespace(
+                    no_ktp=row["no_ktp"],
+                    full_name=row["full_name"],
+                    birthdate=row["birthdate"],
+                    vaccine_type=row["vaccine_type"],
+                    vaccine_count=0,
+                    ingested_at=row["ingested_at"],
+                ),
+            )
+            if row["vaccine_type"] is not None:
+                group.vaccine_count += 1
+            if row["ingested_at"] > group.ingested_at:
+                group.full_name = row["full_name"]
+                group.birthdate = row["birthdate"]
+                group.ingested_at = row["ingested_at"]
+
+        latest = {}
+        # Latest first; like BigQuery, a missing vaccine type sorts first
+        for group in sorted(
+            groups.values(),
+            key=lambda group: (
+                -group.ingested_at.timestamp(),
+                group.vaccine_type is not None,
+                group.vaccine_type or "",
+            ),
+        ):
+            latest.setdefault(group.no_ktp, group)
+        return FakeQueryJob(list(latest.values()))
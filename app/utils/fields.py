@@ -0,0 +1,33 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+def get_requested_fields(available):
+    """
+    Read the ``fields`` query parameter.
+
+    Args:
+        available: The field names a resource exposes, in output order.
+
+    Returns:
+        The requested field names in output order, or all of them when the
+        parameter is absent.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    fields_str = request.args.get("fields")
+    if not fields_str:
+        return list(available)
+
+    requested = {field.strip() for field in fields_str.split(",") if field.strip()}
+    unknown = requested - set(available)
+    if unknown or not requested:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in available if field in requested]
+
+
+def load_fields(query, fields):
+    """Narrow the SELECT of a query to the columns backing the given fields."""
+    return query.options(load_only(*fields))
+
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+
+def parse_import_times(output):
+    """
+    Parse the ``-X importtime`` report of the interpreter.
+
+    Args:
+        output: The stderr of a process started with ``-X importtime``.
+
+    Returns:
+        A list of ``(module, self_us, cumulative_us)`` tuples, slowest
+        cumulative time first.
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # The column header line
+            continue
+        timings.append((fields[2].strip(), self_us, cumulative_us))
+    return sorted(timings, key=lambda timing: timing[2], reverse=True)
+
+
+def profile_imports(config, limit=30):
+    """
+    Boot the app in a fresh interpreter and report import time per module.
+
+    The app is created in a subprocess started with ``-X importtime`` so
+    the report reflects a cold worker start. Scheduled jobs and schema
+    creation are disabled so only the boot path itself is measured.
+
+    Args:
+        config: The config name passed to create_app.
+        limit: Number of modules to print.
+
+    Returns:
+        The exit status of the profiled process.
+    """
+    statement = f"from app.app import create_app; create_app({config!r})"
+    env = dict(os.environ, SCHEDULER_MODE="off", DB_CREATE_ALL="False")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    timings = parse_import_times(result.stderr)
+    if result.returncode != 0:
+        errors = [
+            line for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        print("\n".join(errors), file=sys.stderr)
+        return result.returncode
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us in timings[:limit]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {module}")
+    total_us = sum(self_us for _, self_us, _ in timings)
+    print(f"{total_us / 1000:14.1f} {'':9}  total ({len(timings)} modules)")
+    return 0
@@ -0,0 +1,56 @@
+from datetime import date, time
+
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class IsoJSONEncoder(JSONEncoder):
+    """Standard library encoder writing dates and times in ISO 8601."""
+
+    def default(self, o):
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class OrjsonEncoder(IsoJSONEncoder):
+    """
+    Encoder handing whole documents to orjson.
+
+    orjson writes dates and times in ISO 8601 like IsoJSONEncoder and falls
+    back to its default() for other unsupported types. Output is always
+    UTF-8 rather than ASCII-escaped.
+    """
+
+    def encode(self, o):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.indent:
+            # orjson only indents by two spaces
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(o, default=self.default, option=option).decode()
+
+
+JSON_ENCODERS = {
+    "json": IsoJSONEncoder,
+    "orjson": OrjsonEncoder,
+}
+
+
+def get_json_encoder(name):
+    """
+    Look up a JSON encoder by its JSON_PROVIDER name.
+
+    Raises:
+        ValueError: If the name is unknown or orjson is not installed.
+    """
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON provider orjson requires the orjson package")
+    return JSON_ENCODERS[name]
@@ -0,0 +1,81 @@
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app.db.db import db
+from app.models.scheduler_lease import SchedulerLease
+
+
+def database_utcnow(seconds=0):
+    """
+    SQL expression for the database server's current UTC time, shifted by
+    ``seconds``. Lease times are read from one clock so that skew between
+    the processes' own clocks cannot let two of them hold the lease.
+    """
+    if db.engine.dialect.name == "sqlite":
+        return db.func.datetime("now", f"{seconds:+d} seconds")
+    return db.func.timezone("UTC", db.func.now() + timedelta(seconds=seconds))
+
+
+class LeaderLease:
+    """
+    Leader election through a lease row shared by every process.
+
+    A process is the leader while it holds the named row and the row has
+    not expired. The leader extends the lease each time it calls
+    try_acquire; when it stops doing so, any other process takes over
+    once ``ttl`` seconds have passed.
+
+    Args:
+        name: Name of the lease row.
+        ttl: Lease duration in seconds.
+    """
+
+    def __init__(self, name, ttl=60):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def try_acquire(self):
+        """
+        Acquire or renew the lease. Must run inside an app context.
+
+        Returns:
+            True if this process holds the lease, False otherwise.
+        """
+        now = database_utcnow()
+        expires_at = database_utcnow(self.ttl)
+        try:
+            updated = (
+                SchedulerLease.query.filter(
+                    SchedulerLease.name == self.name,
+                    db.or_(
+                        SchedulerLease.holder == self.holder,
+                        SchedulerLease.expires_at < now,
+                    ),
+                ).update(
+                    {"holder": self.holder, "expires_at": expires_at},
+                    synchronize_session=False,
+                )
+            )
+            if not updated:
+                if SchedulerLease.query.get(self.name):
+                    db.session.rollback()
+                    return False
+                db.session.add(SchedulerLease(self.name, self.holder, expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Another process created the row first
+            db.session.rollback()
+            return False
+
+    def release(self):
+        """Give up the lease if this process holds it."""
+        SchedulerLease.query.filter_by(name=self.name, holder=self.holder).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
@@ -0,0 +1,250 @@
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import monotonic, perf_counter
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that matched no URL rule, so 404 scans do not
+# create a series per path
+UNMATCHED_ROUTE = "unmatched"
+
+# Seconds between two writes of a worker's metrics to the shared directory
+FLUSH_INTERVAL = 1.0
+
+_local = threading.local()
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def clear_multiproc_dir(path):
+    """Remove the metric files of a previous server run from a directory."""
+    for name in glob.glob(os.path.join(path, "metrics_*.json")):
+        os.remove(name)
+
+
+class RequestMetrics:
+    """
+    Per route and method latency histograms and SQL totals.
+
+    Each observation takes one lock and a few list updates; the Prometheus
+    text is only built when the metrics are scraped.
+
+    Every gunicorn worker counts its own requests. With ``multiproc_dir``
+    set, each worker writes its totals to a file there at most once per
+    FLUSH_INTERVAL and a scrape of any worker sums the files of all of
+    them, so a scrape through the load balancer sees the whole server.
+    Files of exited workers are kept so the counters never go back; the
+    directory is emptied when the server starts.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, multiproc_dir=None):
+        self.buckets = tuple(buckets)
+        self.multiproc_dir = multiproc_dir
+        self._series = {}
+        self._statuses = {}
+        self._flushed_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR")
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+
+    def observe(self, route, method, status, duration, statements, db_time):
+        index = bisect_left(self.buckets, duration)
+        key = (route, method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Bucket counts (the last one is +Inf), latency sum, request
+                # count, SQL statements and DB seconds
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0, 0.0]
+            series[0][index] += 1
+            series[1] += duration
+            series[2] += 1
+            series[3] += statements
+            series[4] += db_time
+            status_key = (route, method, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+            flush = self.multiproc_dir and (
+                self._flushed_at is None or monotonic() - self._flushed_at >= FLUSH_INTERVAL
+            )
+            if flush:
+                self._flushed_at = monotonic()
+        if flush:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._statuses.clear()
+
+    def snapshot(self):
+        """Copy this process's series and status counts."""
+        with self._lock:
+            series = {key: [list(value[0])] + value[1:] for key, value in self._series.items()}
+            return series, dict(self._statuses)
+
+    def flush(self):
+        """Write this process's totals to the shared directory."""
+        if not self.multiproc_dir:
+            return
+        series, statuses = self.snapshot()
+        data = {
+            "series": [list(key) + value for key, value in series.items()],
+            "statuses": [list(key) + [count] for key, count in statuses.items()],
+        }
+        path = os.path.join(self.multiproc_dir, f"metrics_{os.getpid()}.json")
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        # Readers only ever see a complete file
+        os.replace(temporary, path)
+
+    def collect(self):
+        """
+        Return the series and status counts to expose: this process's own,
+        or the sum over every worker's file when sharing a directory.
+        """
+        if not self.multiproc_dir:
+            return self.snapshot()
+        self.flush()
+        series, statuses = {}, {}
+        for name in glob.glob(os.path.join(self.multiproc_dir, "metrics_*.json")):
+            try:
+                with open(name) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for route, method, counts, total, count, statements, db_time in data["series"]:
+                merged = series.setdefault(
+                    (route, method), [[0] * len(counts), 0.0, 0, 0, 0.0]
+                )
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+                merged[3] += statements
+                merged[4] += db_time
+            for route, method, status, count in data["statuses"]:
+                key = (route, method, status)
+                statuses[key] = statuses.get(key, 0) + count
+        return series, statuses
+
+    def render(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        series, statuses = self.collect()
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route and method.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (route, method), (counts, total, count, _, _) in sorted(series.items()):
+            labels = f'route="{escape_label(route)}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}'
+                )
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP http_requests_total Requests by route, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(statuses.items()):
+            lines.append(
+                f'http_requests_total{{route="{escape_label(route)}",method="{method}",'
+                f'status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP http_request_sql_statements_total SQL statements issued by requests.",
+            "# TYPE http_request_sql_statements_total counter",
+        ]
+        for (route, method), (_, _, _, statements, _) in sorted(series.items()):
+            lines.append(
+                f'http_request_sql_statements_total{{route="{escape_label(route)}",'
+                f'method="{method}"}} {statements}'
+            )
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time requests spent in SQL statements.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (route, method), (_, _, _, _, db_time) in sorted(series.items()):
+            lines.append(
+                f'http_request_db_seconds_total{{route="{escape_label(route)}",'
+                f'method="{method}"}} {db_time}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def get_request_sql_stats():
+    """
+    Return the [statement count, DB seconds] of the current request, or
+    None outside an instrumented request.
+    """
+    return getattr(_local, "sql", None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "sql", None) is not None:
+        context._metrics_started_at = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def finish_statement(conn, cursor, statement, parameters, context, executemany):
+    sql = getattr(_local, "sql", None)
+    started_at = getattr(context, "_metrics_started_at", None)
+    if sql is not None and started_at is not None:
+        sql[0] += 1
+        sql[1] += perf_counter() - started_at
+
+
+def start_request():
+    _local.started_at = perf_counter()
+    _local.sql = [0, 0.0]
+    _local.status = 500
+
+
+def record_status(response):
+    _local.status = response.status_code
+    return response
+
+
+def finish_request(exc=None):
+    # Runs on teardown, so a streamed response is measured until its last row
+    started_at = getattr(_local, "started_at", None)
+    if started_at is None:
+        return
+    duration = perf_counter() - started_at
+    statements, db_time = _local.sql
+    rule = request.url_rule
+    request_metrics.observe(
+        rule.rule if rule is not None else UNMATCHED_ROUTE,
+        request.method,
+        _local.status,
+        duration,
+        statements,
+        db_time,
+    )
+    _local.started_at = None
+    _local.sql = None
@@ -0,0 +1,50 @@
+import base64
+
+from flask import request
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    raw = "|".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, count):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The opaque cursor string.
+        count: The number of values the cursor must hold.
+
+    Returns:
+        The list of encoded values as strings.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    values = raw.split("|")
+    if len(values) != count:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def get_page_size():
+    """
+    Read the ``limit`` query parameter.
+
+    Raises:
+        ValueError: If the limit is not a positive integer.
+    """
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        raise ValueError("Invalid limit")
+    return min(limit, MAX_PAGE_SIZE)
@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app, has_app_context
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+
+DEFAULT_HASH_METHOD = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+
+# Error returned when a password cannot be hashed within the timeout
+HASH_BUSY_ERROR = "Too many password changes, try again later"
+
+_executor = None
+_pending = None
+_executor_lock = threading.Lock()
+
+
+def get_config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def normalize_method(method):
+    """Spell out the iteration count werkzeug records for a PBKDF2 method."""
+    if method.startswith("pbkdf2:") and method.count(":") == 1:
+        return f"{method}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+def get_hash_method():
+    return normalize_method(get_config("PASSWORD_HASH_METHOD", DEFAULT_HASH_METHOD))
+
+
+def get_executor():
+    """
+    Return the bounded pool password hashes run in, and the semaphore
+    limiting how many hashes may be submitted to it at once.
+
+    PBKDF2 releases the GIL, so a small thread pool keeps a burst of logins
+    from occupying every request thread while still using several cores.
+    The pool is created lazily so each forked worker gets its own.
+    """
+    global _executor, _pending
+    with _executor_lock:
+        if _executor is None:
+            workers = get_config("PASSWORD_HASH_WORKERS", 4)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="password-hash"
+            )
+            _pending = threading.BoundedSemaphore(
+                get_config("PASSWORD_HASH_MAX_PENDING", workers * 4)
+            )
+        return _executor, _pending
+
+
+def run_in_pool(func, *args):
+    """
+    Run a hashing function in the pool and wait for its result.
+
+    At most PASSWORD_HASH_MAX_PENDING hashes are queued or running; callers
+    beyond that wait for a free place, and a hash still queued when its
+    caller gives up is cancelled, so abandoned work never runs later.
+
+    Raises:
+        concurrent.futures.TimeoutError: If the hash does not finish within
+            PASSWORD_HASH_TIMEOUT seconds.
+    """
+    executor, pending = get_executor()
+    deadline = time.monotonic() + get_config("PASSWORD_HASH_TIMEOUT", 10)
+    if not pending.acquire(timeout=deadline - time.monotonic()):
+        raise TimeoutError()
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        pending.release()
+        raise
+    # Runs once the hash finishes or is cancelled
+    future.add_done_callback(lambda _: pending.release())
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def hash_password(password):
+    return run_in_pool(generate_password_hash, password, get_hash_method())
+
+
+def verify_password(password_hash, password):
+    return run_in_pool(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with other parameters than configured."""
+    return password_hash.split("$", 1)[0] != get_hash_method()
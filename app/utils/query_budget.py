@@ -0,0 +1,154 @@
+import threading
+from collections import Counter
+from functools import wraps
+
+from flask import Response, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block issues more SQL than its budget allows."""
+
+
+class QueryBudget:
+    """
+    Limit the SQL statements issued by a block of code.
+
+    Usable as a context manager or as a decorator. Besides the total count,
+    a statement text executed more than QUERY_BUDGET_REPEAT_LIMIT times is
+    reported as a likely N+1 pattern. What happens on a violation depends
+    on QUERY_BUDGET_MODE: "raise" raises QueryBudgetExceeded, "log" logs a
+    warning and "off" skips tracking altogether.
+
+    When a decorated view returns a streamed response, such as an NDJSON
+    stream, the budget also counts the SQL run while the body is iterated
+    and is checked once the stream is exhausted.
+
+    Args:
+        max_statements: Largest number of statements allowed.
+        name: Name used in reports; a decorated function's name by default.
+    """
+
+    def __init__(self, max_statements, name=None):
+        self.max_statements = max_statements
+        self.name = name
+        self.statements = None
+        self.deferred = False
+
+    def __call__(self, func):
+        name = self.name or func.__qualname__
+        max_statements = self.max_statements
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(max_statements, name) as budget:
+                result = func(*args, **kwargs)
+                budget.follow_stream(result)
+                return result
+
+        return wrapper
+
+    def __enter__(self):
+        self.mode = current_app.config.get("QUERY_BUDGET_MODE", "off")
+        if self.mode == "off":
+            return self
+        self.app = current_app._get_current_object()
+        self.repeat_limit = self.app.config.get("QUERY_BUDGET_REPEAT_LIMIT", 3)
+        self.statements = Counter()
+        self._push()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.mode == "off":
+            return False
+        self._pop()
+        # Do not hide the error that interrupted the block
+        if exc_type is None and not self.deferred:
+            self.check()
+        return False
+
+    def _push(self):
+        stack = getattr(_local, "budgets", None)
+        if stack is None:
+            stack = _local.budgets = []
+        stack.append(self)
+
+    def _pop(self):
+        _local.budgets.remove(self)
+
+    def follow_stream(self, result):
+        """
+        Extend the budget over the body of a streamed response.
+
+        The check then runs when the stream is exhausted instead of when
+        the block exits. Other results are left alone.
+        """
+        response = result[0] if isinstance(result, tuple) else result
+        if self.mode == "off" or not isinstance(response, Response):
+            return
+        if not response.is_streamed:
+            return
+        response.response = self._iterate(response.response)
+        self.deferred = True
+
+    def _iterate(self, chunks):
+        iterator = iter(chunks)
+        try:
+            while True:
+                # Only the SQL run to produce a chunk counts, not the consumer's
+                self._push()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self._pop()
+                yield chunk
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+        self.check()
+
+    @property
+    def count(self):
+        return sum(self.statements.values()) if self.statements else 0
+
+    def violations(self):
+        problems = []
+        if self.count > self.max_statements:
+            problems.append(
+                f"{self.count} SQL statements, budget is {self.max_statements}"
+            )
+        for statement, repeats in self.statements.most_common():
+            if repeats <= self.repeat_limit:
+                break
+            problems.append(
+                f"likely N+1, executed {repeats} times: {' '.join(statement.split())[:200]}"
+            )
+        return problems
+
+    def check(self):
+        problems = self.violations()
+        if not problems:
+            return
+        message = f"Query budget of {self.name or 'block'} exceeded: " + "; ".join(problems)
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        self.app.logger.warning(message)
+
+
+def query_budget(max_statements, name=None):
+    """Decorate a view with a QueryBudget of max_statements."""
+    return QueryBudget(max_statements, name)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    budgets = getattr(_local, "budgets", None)
+    if budgets:
+        for budget in budgets:
+            budget.statements[statement] += 1
@@ -0,0 +1,60 @@
+import math
+import time
+
+from flask import current_app, g, request
+
+from app.db.db import REPLICA_BIND
+
+
+# Methods whose handlers only read and may be served by the replica
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Cookie holding the time until which a client that wrote reads the primary
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def replica_configured(app):
+    return REPLICA_BIND in (app.config.get("SQLALCHEMY_BINDS") or {})
+
+
+def is_sticky_to_primary():
+    """Whether the client wrote recently enough to need its own writes."""
+    try:
+        until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def route_request():
+    g.use_read_replica = (
+        request.method in SAFE_METHODS
+        and replica_configured(current_app)
+        and not is_sticky_to_primary()
+    )
+
+
+def mark_primary_reads(response):
+    """
+    Keep a client that just wrote on the primary for READ_REPLICA_STICKY_SECONDS
+    so its next reads do not miss its write while the replica catches up.
+    """
+    if (
+        request.method not in SAFE_METHODS
+        and response.status_code < 400
+        and replica_configured(current_app)
+    ):
+        window = current_app.config.get("READ_REPLICA_STICKY_SECONDS", 5)
+        if window > 0:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                f"{time.time() + window:.3f}",
+                max_age=math.ceil(window),
+                httponly=True,
+            )
+    return response
+
+
+def reset_route(exc=None):
+    # The app context, and g with it, may outlive the request
+    g.pop("use_read_replica", None)
@@ -0,0 +1,124 @@
+import threading
+import uuid
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.utils import import_string
+
+from app.utils.cache import LRUCache
+from app.utils.streaming import wants_stream
+
+
+class ResponseCache:
+    """
+    Cache of successful GET responses grouped in namespaces.
+
+    Entries are keyed by the request path and query string under a
+    generation token stored in the backend itself, and keep the ETag of the
+    response so revalidations are answered without touching the database. Invalidating a namespace
+    replaces its token, which orphans every cached variant of the resource
+    at once; with a shared backend this holds across workers, while the
+    in-process default relies on the TTL to expire other workers' copies.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUCache()
+        self.enabled = True
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend_class = import_string(
+            app.config.get("RESPONSE_CACHE_BACKEND", "app.utils.cache.LRUCache")
+        )
+        self.backend = backend_class(
+            maxsize=app.config.get("RESPONSE_CACHE_SIZE", 1024),
+            ttl=app.config.get("RESPONSE_CACHE_TTL", 60),
+        )
+        self.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+        self._counters = {}
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            counters = self._counters.setdefault(
+                namespace, {"hits": 0, "misses": 0, "invalidations": 0}
+            )
+            counters[counter] += 1
+
+    def _generation(self, namespace):
+        key = f"{namespace}:generation"
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation
+
+    def cached(self, namespace, ttl=None):
+        """
+        Cache the 200 responses of a GET view.
+
+        Apply it outside of conditional_get, so that the ETag it sets is
+        stored with the entry and If-None-Match is answered from the cache.
+
+        Args:
+            namespace: Name of the cached resource, passed to invalidate by
+                the views writing it.
+            ttl: Lifetime of the entries in seconds, RESPONSE_CACHE_TTL when
+                not given.
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != "GET" or wants_stream():
+                    return view(*args, **kwargs)
+
+                key = f"{namespace}:{self._generation(namespace)}:{request.full_path}"
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count(namespace, "hits")
+                    body, status, mimetype, etag = entry
+                    if etag and request.if_none_match.contains_weak(etag):
+                        response = current_app.response_class(status=304)
+                        response.set_etag(etag)
+                        return response, 304
+                    response = current_app.response_class(body, mimetype=mimetype)
+                    if etag:
+                        response.set_etag(etag)
+                    return response, status
+
+                self._count(namespace, "misses")
+                response, status = view(*args, **kwargs)
+                if status == 200 and not response.is_streamed:
+                    etag, _ = response.get_etag()
+                    self.backend.set(
+                        key,
+                        (response.get_data(), status, response.mimetype, etag),
+                        ttl,
+                    )
+                return response, status
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, namespace):
+        """Drop every cached response of a namespace."""
+        self.backend.delete(f"{namespace}:generation")
+        self._count(namespace, "invalidations")
+
+    def stats(self):
+        with self._lock:
+            namespaces = {
+                namespace: {
+                    **counters,
+                    "hit_ratio": counters["hits"] / (counters["hits"] + counters["misses"])
+                    if counters["hits"] + counters["misses"]
+                    else 0.0,
+                }
+                for namespace, counters in self._counters.items()
+            }
+        return {"backend": self.backend.stats(), "namespaces": namespaces}
+
+
+response_cache = ResponseCache()
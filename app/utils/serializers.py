@@ -0,0 +1,65 @@
+from app.db.db import db
+
+
+class ModelSerializer:
+    """
+    Serializer of a model reading plain column tuples.
+
+    Queries built by a serializer select only the requested columns and
+    return tuples, so no ORM object is hydrated per row. Each combination
+    of fields is compiled once into a function zipping a row with the
+    field names; dates and times are left to the JSON encoder.
+
+    Args:
+        model: The serialized model.
+        fields: The field names the model exposes, in output order.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = list(fields)
+        self._compiled = {}
+
+    def query(self, fields, extra=()):
+        """
+        Select the given fields followed by the extra columns.
+
+        Extra columns are available on the rows by name but not output.
+        """
+        names = list(fields) + [name for name in extra if name not in fields]
+        return db.session.query(*[getattr(self.model, name) for name in names])
+
+    def compile(self, fields):
+        """Return the function turning a row of query(fields) into a dict."""
+        key = tuple(fields)
+        serialize = self._compiled.get(key)
+        if serialize is None:
+
+            def serialize(row, names=key):
+                return dict(zip(names, row))
+
+            self._compiled[key] = serialize
+        return serialize
+
+    def dump(self, row, fields):
+        return self.compile(fields)(row)
+
+    def dump_all(self, rows, fields):
+        serialize = self.compile(fields)
+        return [serialize(row) for row in rows]
+
+
+class SerializerRegistry:
+    def __init__(self):
+        self._serializers = {}
+
+    def register(self, model, fields):
+        serializer = ModelSerializer(model, fields)
+        self._serializers[model] = serializer
+        return serializer
+
+    def get(self, model):
+        return self._serializers[model]
+
+
+serializers = SerializerRegistry()
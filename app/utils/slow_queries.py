@@ -0,0 +1,153 @@
+import logging
+import os
+import random
+import re
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Longest parameters repr kept per entry
+MAX_PARAMETERS_LENGTH = 1000
+
+# Quoted literals of a plan, which hold the bound values of the statement
+PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def redact_plan(plan):
+    """Replace the quoted literals of a query plan with '?'."""
+    return PLAN_LITERAL.sub("'?'", plan)
+
+
+def find_caller_frame():
+    """Describe the innermost frame of application code issuing a statement."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, os.path.dirname(APP_DIR))}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def explain(cursor, statement, parameters):
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) for a statement on a DBAPI connection.
+
+    A separate raw cursor is used so the explain is neither instrumented
+    nor mixed into the results of the original statement, and a savepoint
+    keeps a failing explain from aborting the surrounding transaction.
+    """
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            plan = f"EXPLAIN failed: {e}"
+        explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+class SlowQueryLog:
+    """
+    Log of the statements slower than a threshold.
+
+    Entries hold the statement, the route and the frame of application code
+    that issued it, and are kept in a bounded buffer as well as logged.
+    Bound parameters carry password hashes and personal data, so they are
+    only recorded when ``log_parameters`` is set; otherwise the quoted
+    values in plans are redacted too. On Postgres a sample of slow SELECT statements is run
+    again under EXPLAIN (ANALYZE, BUFFERS) and the plan stored with them;
+    only SELECTs are explained since ANALYZE executes the statement.
+    """
+
+    def __init__(
+        self, threshold=0.5, explain_sample_rate=0.1, size=100, log_parameters=False
+    ):
+        self.threshold = threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.log_parameters = log_parameters
+        self.entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.threshold = app.config.get("SLOW_QUERY_THRESHOLD", 0.5)
+        self.explain_sample_rate = app.config.get("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1)
+        self.log_parameters = app.config.get("SLOW_QUERY_LOG_PARAMETERS", False)
+        with self._lock:
+            self.entries = deque(maxlen=app.config.get("SLOW_QUERY_LOG_SIZE", 100))
+
+    def should_explain(self, conn, statement):
+        return (
+            conn.dialect.name == "postgresql"
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_sample_rate
+        )
+
+    def record(self, conn, cursor, statement, parameters, executemany, duration):
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration": duration,
+            "statement": statement,
+            "parameters": (
+                repr(parameters)[:MAX_PARAMETERS_LENGTH] if self.log_parameters else None
+            ),
+            "route": None,
+            "method": None,
+            "frame": find_caller_frame(),
+            "plan": None,
+        }
+        if has_request_context():
+            entry["route"] = request.url_rule.rule if request.url_rule else request.path
+            entry["method"] = request.method
+        if not executemany and self.should_explain(conn, statement):
+            plan = explain(cursor, statement, parameters)
+            entry["plan"] = plan if self.log_parameters else redact_plan(plan)
+
+        with self._lock:
+            self.entries.append(entry)
+        logger.warning(
+            "Slow query (%.3fs) on %s %s from %s: %s%s%s",
+            duration,
+            entry["method"],
+            entry["route"],
+            entry["frame"],
+            " ".join(statement.split()),
+            f"; parameters: {entry['parameters']}" if self.log_parameters else "",
+            f"\n{entry['plan']}" if entry["plan"] else "",
+        )
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self.entries))
+
+
+slow_query_log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_slow_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if slow_query_log.threshold > 0:
+        context._slow_query_started_at = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def check_slow_query(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_slow_query_started_at", None)
+    if started_at is None:
+        return
+    duration = perf_counter() - started_at
+    if duration >= slow_query_log.threshold:
+        slow_query_log.record(conn, cursor, statement, parameters, executemany, duration)
@@ -0,0 +1,36 @@
+from flask import Response, current_app, json, request, stream_with_context
+
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_stream():
+    """Whether the client asked for an NDJSON stream instead of a JSON list."""
+    if request.args.get("stream") == "1":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(query, serialize):
+    """
+    Stream the rows of a query as newline-delimited JSON.
+
+    Rows are fetched in batches of STREAM_YIELD_PER through a server-side
+    cursor where the driver supports one, and each row is written as soon
+    as it is read, so memory use does not depend on the table size.
+
+    Args:
+        query: The query whose rows are streamed.
+        serialize: Callable turning one row into a JSON-serializable dict.
+
+    Returns:
+        A streaming Flask response.
+    """
+    yield_per = current_app.config.get("STREAM_YIELD_PER", 1000)
+
+    def generate():
+        for row in query.yield_per(yield_per):
+            yield json.dumps(serialize(row)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,108 @@
+import queue
+import threading
+
+from app.db.db import db
+
+
+class ChunkPipeline:
+    """
+    Producer/consumer pipeline writing rows to the database in chunks.
+
+    The calling thread produces rows; each row is routed by its key to one
+    of ``writers`` threads, so rows sharing a key are always written in
+    order by the same writer and writers never contend on the same key.
+    Every writer has a bounded queue of ``queue_depth`` chunks of at most
+    ``chunk_size`` rows, which bounds memory no matter how many rows are
+    produced. Writers run in their own app context and therefore use their
+    own session and connection.
+
+    Args:
+        app: The Flask application the writers run in.
+        write_chunk: Callable writing a list of rows and returning a result;
+            the pipeline commits after each call.
+        chunk_size: Rows per chunk.
+        queue_depth: Chunks each writer may have waiting.
+        writers: Number of writer threads.
+    """
+
+    def __init__(self, app, write_chunk, chunk_size=1000, queue_depth=4, writers=4):
+        self.app = app
+        self.write_chunk = write_chunk
+        self.chunk_size = chunk_size
+        self.queue_depth = queue_depth
+        self.writers = writers
+        self.results = []
+        self.error = None
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+
+    def _write(self, chunks):
+        with self.app.app_context():
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    # Keep draining after a failure so the producer never blocks
+                    if self._failed.is_set():
+                        continue
+                    try:
+                        result = self.write_chunk(list(chunk.values()))
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        with self._lock:
+                            self.error = self.error or e
+                        self._failed.set()
+                        continue
+                    with self._lock:
+                        self.results.append(result)
+            finally:
+                db.session.remove()
+
+    def run(self, rows, key):
+        """
+        Write every row and wait for the writers to finish.
+
+        Args:
+            rows: Iterable of row dicts; consumed lazily.
+            key: Name of the row field used for routing and deduplication;
+                within a chunk the last row of a key wins.
+
+        Returns:
+            The list of write_chunk results.
+
+        Raises:
+            Exception: The first error raised by a writer.
+        """
+        queues = [queue.Queue(maxsize=self.queue_depth) for _ in range(self.writers)]
+        threads = [
+            threading.Thread(target=self._write, args=(chunks,), daemon=True)
+            for chunks in queues
+        ]
+        for thread in threads:
+            thread.start()
+
+        buffers = [{} for _ in range(self.writers)]
+        try:
+            for row in rows:
+                if self._failed.is_set():
+                    break
+                index = hash(row[key]) % self.writers
+                buffers[index][row[key]] = row
+                if len(buffers[index]) >= self.chunk_size:
+                    queues[index].put(buffers[index])
+                    buffers[index] = {}
+            else:
+                for index, buffer in enumerate(buffers):
+                    if buffer:
+                        queues[index].put(buffer)
+        finally:
+            for chunks in queues:
+                chunks.put(None)
+            for thread in threads:
+                thread.join()
+
+        if self.error:
+            raise self.error
+        return self.results
@@ -0,0 +1,111 @@
+import threading
+import time
+import uuid
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app.utils.auth import Principal
+
+
+class TokenDenylist:
+    """
+    In-memory record of revoked bearer tokens.
+
+    Single tokens are revoked by id and every token of an employee by the
+    time of revocation. Entries older than the token lifetime can no longer
+    match a valid token and are purged, so the denylist stays small.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._subjects = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, now, ttl):
+        cutoff = now - ttl
+        for entries in (self._tokens, self._subjects):
+            expired = [key for key, revoked_at in entries.items() if revoked_at < cutoff]
+            for key in expired:
+                del entries[key]
+
+    def revoke(self, token_id, ttl):
+        now = time.time()
+        with self._lock:
+            self._purge(now, ttl)
+            self._tokens[token_id] = now
+
+    def revoke_subject(self, subject, ttl):
+        now = time.time()
+        with self._lock:
+            self._purge(now, ttl)
+            self._subjects[subject] = now
+
+    def is_revoked(self, token_id, subject, issued_at):
+        with self._lock:
+            if token_id in self._tokens:
+                return True
+            revoked_at = self._subjects.get(subject)
+            return revoked_at is not None and issued_at <= revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._subjects.clear()
+
+
+token_denylist = TokenDenylist()
+
+
+def get_serializer():
+    # The key version is part of the salt, so bumping it invalidates every
+    # token signed with the previous version
+    key_version = current_app.config.get("AUTH_TOKEN_KEY_VERSION", 1)
+    return URLSafeTimedSerializer(
+        current_app.config["SECRET_KEY"], salt=f"auth-token-v{key_version}"
+    )
+
+
+def issue_token(employee):
+    """Sign a short-lived bearer token for the employee."""
+    claims = {
+        "sub": employee.id,
+        "username": employee.username,
+        "name": employee.name,
+        "kv": current_app.config.get("AUTH_TOKEN_KEY_VERSION", 1),
+        "jti": uuid.uuid4().hex,
+        "iat": time.time(),
+    }
+    return get_serializer().dumps(claims)
+
+
+def load_token_claims(token):
+    """
+    Verify a bearer token without touching the database.
+
+    Returns:
+        The token claims, or None if the token is invalid, expired or
+        revoked.
+    """
+    ttl = current_app.config.get("AUTH_TOKEN_TTL", 900)
+    try:
+        claims = get_serializer().loads(token, max_age=ttl)
+    except BadSignature:
+        return None
+    if token_denylist.is_revoked(claims["jti"], claims["sub"], claims["iat"]):
+        return None
+    return claims
+
+
+def load_principal_from_token(token):
+    claims = load_token_claims(token)
+    if claims is None:
+        return None
+    return Principal(claims["sub"], claims["username"], claims["name"])
+
+
+def get_bearer_token(request):
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.startswith("Bearer "):
+        return None
+    return authorization[len("Bearer "):].strip()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from app.app import create_app
+from app.db.db import db
+from app.utils.metrics import finish_request, record_status, request_metrics, start_request
+
+
+def time_hooks(app, iterations):
+    """Seconds per request spent in the metrics request hooks."""
+    with app.test_request_context("/patients/1"):
+        response = app.response_class("")
+        start = time.perf_counter()
+        for _ in range(iterations):
+            start_request()
+            record_status(response)
+            finish_request()
+        return (time.perf_counter() - start) / iterations
+
+
+def time_statements(app, iterations, instrumented):
+    """Seconds per SQL statement, with or without a request being measured."""
+    with app.test_request_context("/patients/1"):
+        if instrumented:
+            start_request()
+        connection = db.engine.connect()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            connection.execute("SELECT 1")
+        elapsed = (time.perf_counter() - start) / iterations
+        connection.close()
+        if instrumented:
+            finish_request()
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the per-request cost of the request metrics."
+    )
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    request_metrics.clear()
+    with app.app_context():
+        hooks = time_hooks(app, args.iterations)
+        plain = time_statements(app, args.iterations // 10, instrumented=False)
+        measured = time_statements(app, args.iterations // 10, instrumented=True)
+
+    print(f"request hooks:        {hooks * 1e6:8.2f} us per request")
+    print(f"SQL statement:        {plain * 1e6:8.2f} us uninstrumented")
+    print(f"SQL statement:        {measured * 1e6:8.2f} us instrumented")
+    print(f"SQL instrumentation:  {(measured - plain) * 1e6:8.2f} us per statement")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+DEFAULT_METHODS = [
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:260000",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha512:260000",
+]
+
+
+def measure(method, seconds):
+    """Return the password checks per second one core achieves for a method."""
+    password_hash = generate_password_hash("benchmark-password", method)
+    checks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        check_password_hash(password_hash, "benchmark-password")
+        checks += 1
+    return checks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report password hashes per second for each hash setting."
+    )
+    parser.add_argument("methods", nargs="*", default=DEFAULT_METHODS)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for method in args.methods:
+        print(f"{method:<28} {measure(method, args.seconds):10.1f} hashes/s")
+
+
+if __name__ == "__main__":
+    main()
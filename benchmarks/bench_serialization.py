@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from flask import json
+
+from app.app import create_app
+from app.controllers.patients_controller import PATIENT_FIELDS, patient_serializer
+from app.db.db import db
+from app.models.patient import Patient
+from app.utils.fields import load_fields
+from app.utils.json_encoders import IsoJSONEncoder, OrjsonEncoder
+
+
+def seed_patients(count):
+    db.session.bulk_insert_mappings(
+        Patient,
+        [
+            {
+                "name": f"Patient {number}",
+                "gender": "Female" if number % 2 else "Male",
+                "birthdate": date(1950 + number % 50, 1 + number % 12, 1 + number % 28),
+                "no_ktp": f"{number:016d}",
+                "address": f"Jl. Merdeka No. {number}",
+                "vaccine_type": "Sinovac",
+                "vaccine_count": number % 3,
+            }
+            for number in range(count)
+        ],
+    )
+    db.session.commit()
+
+
+def serialize_orm(fields):
+    # The previous path: hydrate ORM objects and build each dict field by field
+    data = []
+    for patient in load_fields(Patient.query, fields).order_by(Patient.id):
+        item = {}
+        for field in fields:
+            value = getattr(patient, field)
+            if isinstance(value, date):
+                value = value.isoformat()
+            item[field] = value
+        data.append(item)
+    db.session.expunge_all()
+    return data
+
+
+def serialize_tuples(fields):
+    query = patient_serializer.query(fields).order_by(Patient.id)
+    return patient_serializer.dump_all(query, fields)
+
+
+PATHS = {
+    "orm+json": (serialize_orm, IsoJSONEncoder),
+    "orm+orjson": (serialize_orm, OrjsonEncoder),
+    "tuples+json": (serialize_tuples, IsoJSONEncoder),
+    "tuples+orjson": (serialize_tuples, OrjsonEncoder),
+}
+
+
+def measure(app, serialize, encoder, rows, repeat):
+    app.json_encoder = encoder
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = json.dumps(serialize(PATIENT_FIELDS))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare list serialization paths on GET /patients data."
+    )
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    with app.app_context():
+        seed_patients(args.rows)
+        print(f"{'path':<15} {'best ms':>9} {'rows/s':>12} {'bytes':>10}")
+        for name, (serialize, encoder) in PATHS.items():
+            elapsed, size = measure(app, serialize, encoder, args.rows, args.repeat)
+            print(
+                f"{name:<15} {elapsed * 1000:9.1f} {args.rows / elapsed:12.0f} {size:10d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
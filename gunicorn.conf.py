@@ -0,0 +1,37 @@
+import os
+import sys
+
+from app.utils.db_pool import dispose_engines
+from app.utils.metrics import clear_multiproc_dir, request_metrics
+
+# Workers share their metrics through this directory, so a scrape of any
+# worker reports the whole server; see RequestMetrics
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/hospital-flask-metrics")
+
+
+def _dispose_preloaded_app():
+    # Only an app loaded in the master with --preload can hold connections
+    # that would otherwise be shared with the workers
+    wsgi = sys.modules.get("wsgi")
+    if wsgi is not None:
+        dispose_engines(wsgi.app)
+
+
+def pre_fork(server, worker):
+    _dispose_preloaded_app()
+
+
+def post_fork(server, worker):
+    _dispose_preloaded_app()
+
+
+def on_starting(server):
+    # Totals of a previous run would otherwise be added to the new ones
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    clear_multiproc_dir(path)
+
+
+def worker_exit(server, worker):
+    # Keep the requests counted since the worker's last periodic write
+    request_metrics.flush()
@@ -0,0 +1,49 @@
+"""Enforce the 30-minute booking window in Postgres
+
+Databases created by `flask init-db` already have the constraint; it is
+only added where it is missing. Adding it fails while the table holds
+appointments of the same doctor less than 30 minutes apart, which have
+to be moved or cancelled first.
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = 'appointments_doctor_booking_window_excl'
+
+
+def has_constraint(bind):
+    return bind.execute(
+        sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+        name=CONSTRAINT,
+    ).scalar() is not None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or has_constraint(bind):
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        f"ALTER TABLE appointments ADD CONSTRAINT {CONSTRAINT} "
+        "EXCLUDE USING gist (doctor_id WITH =, tsrange(datetime, datetime + "
+        "interval '1800 seconds') WITH &&)"
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute(f'ALTER TABLE appointments DROP CONSTRAINT IF EXISTS {CONSTRAINT}')
@@ -0,0 +1,50 @@
+"""Add row versions and table change counters
+
+Adds the version column the ORM checks on update to patients, doctors,
+employees and appointments, and the table_versions counters behind the
+collection ETags. Existing rows start at version 1 and every counter at 0.
+
+Revision ID: 8b4e6d2c1a57
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2c1a57'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('appointments', 'doctors', 'employees', 'patients')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in VERSIONED_TABLES:
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'version' not in columns:
+            op.add_column(
+                table,
+                sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+            )
+
+    if 'table_versions' not in inspector.get_table_names():
+        table_versions = op.create_table(
+            'table_versions',
+            sa.Column('name', sa.String(length=100), primary_key=True),
+            sa.Column('version', sa.BigInteger(), nullable=False),
+        )
+        op.bulk_insert(
+            table_versions, [{'name': name, 'version': 0} for name in VERSIONED_TABLES]
+        )
+
+
+def downgrade():
+    op.drop_table('table_versions')
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
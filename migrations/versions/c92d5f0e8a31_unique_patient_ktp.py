@@ -0,0 +1,63 @@
+"""Make patients.no_ktp unique
+
+The BigQuery sync upserts patients with ON CONFLICT (no_ktp), which needs
+a unique index. Duplicate KTPs are merged into the patient registered
+first: their appointments move to that patient and the other rows are
+deleted. Vaccine data of the deleted rows comes back with the next sync.
+
+Revision ID: c92d5f0e8a31
+Revises: 8b4e6d2c1a57
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c92d5f0e8a31'
+down_revision = '8b4e6d2c1a57'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_patients_no_ktp'
+
+
+def has_unique_ktp(inspector):
+    for index in inspector.get_indexes('patients'):
+        if index['column_names'] == ['no_ktp'] and index['unique']:
+            return True
+    return any(
+        constraint['column_names'] == ['no_ktp']
+        for constraint in inspector.get_unique_constraints('patients')
+    )
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if has_unique_ktp(inspector):
+        return
+
+    op.execute(
+        """
+        UPDATE appointments SET patient_id = (
+            SELECT MIN(kept.id) FROM patients kept
+            JOIN patients duplicate ON duplicate.no_ktp = kept.no_ktp
+            WHERE duplicate.id = appointments.patient_id
+        )
+        WHERE patient_id NOT IN (SELECT MIN(id) FROM patients GROUP BY no_ktp)
+        """
+    )
+    op.execute(
+        "DELETE FROM patients WHERE id NOT IN "
+        "(SELECT MIN(id) FROM patients GROUP BY no_ktp)"
+    )
+
+    if any(index['name'] == INDEX for index in inspector.get_indexes('patients')):
+        op.drop_index(INDEX, table_name='patients')
+    op.create_index(INDEX, 'patients', ['no_ktp'], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name='patients')
+    op.create_index(INDEX, 'patients', ['no_ktp'], unique=False)
@@ -1,11 +1,18 @@
 import os
+import sys
 from dotenv import load_dotenv
-from app.app import create_app
 
 load_dotenv()
 
 config = os.getenv('FLASK_ENV') or 'development'
 
+if "--import-profile" in sys.argv:
+    # Report how long each module takes to import on a cold start
+    from app.utils.import_profile import profile_imports
+    sys.exit(profile_imports(config))
+
+from app.app import create_app
+
 app = create_app(config)
 
 if __name__ == "__main__":
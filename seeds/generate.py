@@ -0,0 +1,476 @@
+import argparse
+import csv
+import io
+import math
+import random
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from itertools import islice
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from app.db.db import db
+from app.models.appointment import APPOINTMENT_DURATION, Appointment
+from app.models.doctor import Doctor
+from app.models.employee import Employee
+from app.models.patient import Patient
+from app.models.table_version import bump_table_versions
+from app.utils.passwords import hash_password
+
+
+# Province codes used as the first two digits of a KTP
+PROVINCES = [
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 31, 32, 33, 34, 35, 36, 51, 52,
+    53, 61, 62, 63, 64, 65, 71, 72, 73, 74, 75, 76, 81, 82, 91, 92, 94,
+]
+# Regencies and districts per province and per regency
+REGENCIES = 30
+DISTRICTS = 30
+REGIONS = len(PROVINCES) * REGENCIES * DISTRICTS
+BIRTH_START = date(1940, 1, 1).toordinal()
+BIRTH_DAYS = date(2010, 1, 1).toordinal() - BIRTH_START
+SERIALS = 9999
+KTP_SPACE = REGIONS * BIRTH_DAYS * 2 * SERIALS
+
+MALE_NAMES = [
+    "Agus", "Budi", "Dedi", "Eko", "Fajar", "Hendra", "Irfan", "Joko", "Rudi",
+    "Slamet", "Taufik", "Wahyu", "Yusuf", "Bambang", "Andi", "Rizky",
+]
+FEMALE_NAMES = [
+    "Ani", "Dewi", "Fitri", "Indah", "Lestari", "Maya", "Nur", "Putri", "Ratna",
+    "Sari", "Siti", "Wulan", "Yuni", "Ayu", "Rina", "Dian",
+]
+FAMILY_NAMES = [
+    "Santoso", "Wijaya", "Saputra", "Hidayat", "Kusuma", "Pratama", "Setiawan",
+    "Nugroho", "Siregar", "Nasution", "Simanjuntak", "Halim", "Gunawan",
+    "Susanto", "Lubis", "Harahap",
+]
+STREETS = [
+    "Merdeka", "Sudirman", "Thamrin", "Diponegoro", "Gatot Subroto",
+    "Ahmad Yani", "Pahlawan", "Veteran", "Gajah Mada", "Hayam Wuruk",
+]
+CITIES = [
+    "Jakarta", "Bandung", "Surabaya", "Medan", "Semarang", "Makassar",
+    "Yogyakarta", "Denpasar", "Palembang", "Malang",
+]
+VACCINES = ["Sinovac", "AstraZeneca", "Pfizer", "Moderna", "Sinopharm"]
+
+# Working hours of the doctors, full-day shifts being the most common
+SHIFTS = [
+    (dt_time(7), dt_time(15)),
+    (dt_time(8), dt_time(16)),
+    (dt_time(8), dt_time(16)),
+    (dt_time(9), dt_time(17)),
+    (dt_time(13), dt_time(21)),
+    (dt_time(8), dt_time(12)),
+    (dt_time(16), dt_time(21)),
+]
+STATUSES = ["DONE"] * 7 + ["CANCELLED"] + ["IN_QUEUE"] * 2
+
+def table_rng(seed, name):
+    # Every table has its own stream, so changing one count leaves the
+    # rows of the other tables unchanged
+    return random.Random(f"{seed}:{name}")
+
+
+class KtpGenerator:
+    """
+    Deterministic generator of unique, well-formed KTP numbers.
+
+    A KTP is a 6 digit region code, the birthdate as DDMMYY with 40 added
+    to the day for women, and a 4 digit serial. The i-th number is taken
+    from a permutation of every (region, birthdate, gender, serial)
+    combination, ``(i * multiplier + offset) mod size``, which is a
+    bijection as long as the multiplier is coprime with the size: numbers
+    never repeat and still look random.
+    """
+
+    def __init__(self, rng):
+        self.multiplier = rng.randrange(KTP_SPACE // 2, KTP_SPACE)
+        while math.gcd(self.multiplier, KTP_SPACE) != 1:
+            self.multiplier += 1
+        self.offset = rng.randrange(KTP_SPACE)
+
+        # Every part of a number is looked up rather than formatted per row
+        self.regions = [
+            f"{province}{regency:02d}{district:02d}"
+            for province in PROVINCES
+            for regency in range(1, REGENCIES + 1)
+            for district in range(1, DISTRICTS + 1)
+        ]
+        self.birthdates = []
+        for day in range(BIRTH_DAYS):
+            birthdate = date.fromordinal(BIRTH_START + day)
+            self.birthdates.append(
+                (
+                    birthdate,
+                    f"{birthdate.day:02d}{birthdate.month:02d}{birthdate.year % 100:02d}",
+                    f"{birthdate.day + 40:02d}{birthdate.month:02d}{birthdate.year % 100:02d}",
+                )
+            )
+        self.serials = [f"{serial:04d}" for serial in range(1, SERIALS + 1)]
+
+    def __call__(self, index):
+        """
+        Returns:
+            A ``(no_ktp, birthdate, female)`` tuple for the index.
+        """
+        value = (index * self.multiplier + self.offset) % KTP_SPACE
+        value, serial = divmod(value, SERIALS)
+        value, female = divmod(value, 2)
+        region, day = divmod(value, BIRTH_DAYS)
+        birthdate = self.birthdates[day]
+        no_ktp = self.regions[region] + birthdate[1 + female] + self.serials[serial]
+        return no_ktp, birthdate[0], bool(female)
+
+
+def generate_patients(count, first_id, seed):
+    rng = table_rng(seed, "patients")
+    ktp = KtpGenerator(rng)
+    for index in range(count):
+        # Index the KTP permutation by patient id so a dataset appended with
+        # the same seed draws KTPs the first one has not used
+        no_ktp, birthdate, female = ktp(first_id - 1 + index)
+        # One draw per row, split into the individual choices, is several
+        # times cheaper than a call to the generator for each of them
+        draw = rng.getrandbits(64)
+        draw, first_name = divmod(draw, 16)
+        draw, family_name = divmod(draw, len(FAMILY_NAMES))
+        draw, street = divmod(draw, len(STREETS))
+        draw, number = divmod(draw, 200)
+        draw, city = divmod(draw, len(CITIES))
+        draw, vaccine = divmod(draw, len(VACCINES) * 10)
+        vaccine, vaccinated = divmod(vaccine, 10)
+        yield (
+            first_id + index,
+            f"{(FEMALE_NAMES if female else MALE_NAMES)[first_name]} "
+            f"{FAMILY_NAMES[family_name]}",
+            "Female" if female else "Male",
+            birthdate,
+            no_ktp,
+            f"Jl. {STREETS[street]} No. {number + 1}, {CITIES[city]}",
+            # Seven in ten patients are vaccinated, with one to three doses
+            VACCINES[vaccine] if vaccinated >= 3 else None,
+            draw % 3 + 1 if vaccinated >= 3 else None,
+        )
+
+
+def generate_doctors(count, first_id, seed, password_hash):
+    rng = table_rng(seed, "doctors")
+    for index in range(count):
+        female = rng.random() < 0.5
+        work_start_time, work_end_time = rng.choice(SHIFTS)
+        yield (
+            first_id + index,
+            f"dr. {rng.choice(FEMALE_NAMES if female else MALE_NAMES)} "
+            f"{rng.choice(FAMILY_NAMES)}",
+            f"doctor{first_id + index:05d}",
+            password_hash,
+            "Female" if female else "Male",
+            date.fromordinal(date(1960, 1, 1).toordinal() + rng.randrange(12000)),
+            work_start_time,
+            work_end_time,
+        )
+
+
+def generate_employees(count, first_id, seed, password_hash):
+    rng = table_rng(seed, "employees")
+    for index in range(count):
+        female = rng.random() < 0.5
+        yield (
+            first_id + index,
+            f"{rng.choice(FEMALE_NAMES if female else MALE_NAMES)} "
+            f"{rng.choice(FAMILY_NAMES)}",
+            f"employee{first_id + index:05d}",
+            password_hash,
+            "Female" if female else "Male",
+            date.fromordinal(date(1970, 1, 1).toordinal() + rng.randrange(10000)),
+        )
+
+
+def shift_slots(day, work_start_time, work_end_time):
+    """Every appointment time of a shift, a booking window apart."""
+    slot = datetime.combine(day, work_start_time)
+    end = datetime.combine(day, work_end_time)
+    slots = []
+    while slot <= end:
+        slots.append(slot)
+        slot += APPOINTMENT_DURATION
+    return slots
+
+
+def generate_appointments(
+    count, first_id, seed, patient_ids, doctors, start_date, occupancy
+):
+    """
+    Book appointments day after day from start_date.
+
+    Each doctor's shift is cut into slots a booking window apart and every
+    slot is taken with probability ``occupancy``, so appointments of a
+    doctor never conflict with each other.
+
+    Args:
+        patient_ids: ``(first, count)`` of the patient ids to book for.
+        doctors: ``(id, work_start_time, work_end_time)`` tuples.
+    """
+    rng = table_rng(seed, "appointments")
+    first_patient, patients = patient_ids
+    appointment_id = first_id
+    last_id = first_id + count
+    day = start_date
+    while appointment_id < last_id:
+        slots_by_shift = {}
+        for doctor_id, work_start_time, work_end_time in doctors:
+            shift = (work_start_time, work_end_time)
+            slots = slots_by_shift.get(shift)
+            if slots is None:
+                slots = slots_by_shift[shift] = shift_slots(day, *shift)
+            for slot in slots:
+                if rng.random() >= occupancy:
+                    continue
+                yield (
+                    appointment_id,
+                    first_patient + int(rng.random() * patients),
+                    doctor_id,
+                    slot,
+                    rng.choice(STATUSES),
+                    "",
+                    "",
+                )
+                appointment_id += 1
+                if appointment_id == last_id:
+                    return
+        day += timedelta(days=1)
+
+
+def to_csv(table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+def copy_csv(connection, table, columns, buffer):
+    """Load a CSV chunk with COPY ... FROM STDIN on Postgres."""
+    # CSV has no distinct NULL: unquoted empty values are NULL except in
+    # the columns that cannot hold one, where they are empty strings
+    force_not_null = [
+        name
+        for name in columns
+        if not (table.c[name].nullable and table.c[name].default is None)
+    ]
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(force_not_null)}))",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def to_parameters(table, columns, rows):
+    # Parameters are keyed by attribute name, which differs for the passwords
+    keys_by_name = {column.name: column.key for column in table.columns}
+    keys = [keys_by_name[name] for name in columns]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def insert_parameters(connection, table, columns, parameters):
+    """Load a chunk with one executemany INSERT."""
+    connection.execute(table.insert(), parameters)
+
+
+def load(connection, model, columns, rows, chunk_size):
+    """
+    Load generated rows into a table, one transaction per chunk.
+
+    Postgres gets CSV through COPY, other databases a chunked executemany.
+    The next chunk is generated in a background thread while the current
+    one is written, so the database does not wait on the generator.
+
+    Returns:
+        The number of rows loaded.
+    """
+    table = model.__table__
+    if connection.dialect.name == "postgresql":
+        prepare, write = to_csv, copy_csv
+    else:
+        prepare, write = to_parameters, insert_parameters
+    rows = iter(rows)
+
+    def next_chunk():
+        chunk = list(islice(rows, chunk_size))
+        return len(chunk), prepare(table, columns, chunk)
+
+    loaded = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(next_chunk)
+        while True:
+            count, chunk = pending.result()
+            if not count:
+                return loaded
+            pending = executor.submit(next_chunk)
+            with connection.begin():
+                write(connection, table, columns, chunk)
+            loaded += count
+
+
+def next_id(connection, model):
+    table = model.__table__
+    return (connection.execute(db.select([db.func.max(table.c.id)])).scalar() or 0) + 1
+
+
+def generate(
+    connection,
+    patients,
+    doctors,
+    appointments,
+    employees=0,
+    seed=0,
+    start_date=date(2024, 1, 1),
+    occupancy=0.8,
+    chunk_size=50000,
+    password="password",
+    report=None,
+):
+    """
+    Add a deterministic synthetic dataset to the database.
+
+    Rows are appended after the existing ones with explicit ids, so the
+    appointments only reference the generated patients and doctors. Every
+    generated doctor and employee shares one password hash.
+
+    Args:
+        connection: The SQLAlchemy connection to load through.
+        patients, doctors, appointments, employees: Rows to generate.
+        seed: Seed of the random streams; equal seeds give equal data.
+        start_date: Day of the first appointments.
+        occupancy: Share of the appointment slots that get booked.
+        chunk_size: Rows per COPY or executemany.
+        password: Password of the generated doctors and employees.
+        report: Optional callable receiving ``(table, rows, seconds)``.
+
+    Returns:
+        The ``(id, work_start_time, work_end_time)`` tuples of the
+        generated doctors.
+    """
+    password_hash = hash_password(password)
+    first_patient = next_id(connection, Patient)
+    first_doctor = next_id(connection, Doctor)
+
+    doctor_rows = list(generate_doctors(doctors, first_doctor, seed, password_hash))
+    shifts = [(row[0], row[6], row[7]) for row in doctor_rows]
+    if appointments and not (patients and doctors):
+        raise ValueError("Appointments need generated patients and doctors")
+
+    tables = [
+        (
+            Patient,
+            ["id", "name", "gender", "birthdate", "no_ktp", "address",
+             "vaccine_type", "vaccine_count"],
+            generate_patients(patients, first_patient, seed),
+        ),
+        (
+            Doctor,
+            ["id", "name", "username", "password", "gender", "birthdate",
+             "work_start_time", "work_end_time"],
+            doctor_rows,
+        ),
+        (
+            Employee,
+            ["id", "name", "username", "password", "gender", "birthdate"],
+            generate_employees(employees, next_id(connection, Employee), seed, password_hash),
+        ),
+        (
+            Appointment,
+            ["id", "patient_id", "doctor_id", "datetime", "status", "diagnose", "notes"],
+            generate_appointments(
+                appointments,
+                next_id(connection, Appointment),
+                seed,
+                (first_patient, patients),
+                shifts,
+                start_date,
+                occupancy,
+            ),
+        ),
+    ]
+    loaded_tables = []
+    for model, columns, rows in tables:
+        start = time.perf_counter()
+        loaded = load(connection, model, columns, rows, chunk_size)
+        if loaded:
+            loaded_tables.append(model.__tablename__)
+        if report:
+            report(model.__tablename__, loaded, time.perf_counter() - start)
+
+    with connection.begin():
+        if connection.dialect.name == "postgresql":
+            # Explicit ids leave the id sequences behind
+            for name in loaded_tables:
+                connection.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT MAX(id) FROM {name}))"
+                )
+        bump_table_versions(connection, loaded_tables)
+    if connection.dialect.name == "postgresql" and loaded_tables:
+        connection.execute(f"ANALYZE {', '.join(loaded_tables)}")
+    return shifts
+
+
+def print_report(table, rows, seconds):
+    rate = rows / seconds if seconds else 0
+    print(f"{table:14} {rows:12,} rows  {seconds:8.1f} s  {rate:12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a large deterministic synthetic dataset."
+    )
+    parser.add_argument("--config", default="production")
+    parser.add_argument("--patients", type=int, default=1000000)
+    parser.add_argument("--doctors", type=int, default=300)
+    parser.add_argument("--appointments", type=int, default=10000000)
+    parser.add_argument("--employees", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=date(2024, 1, 1),
+        help="Day of the first appointments, YYYY-MM-DD",
+    )
+    parser.add_argument("--occupancy", type=float, default=0.8)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    # The config reads the scheduler mode from the environment on import; a
+    # seeding run must not start the scheduled jobs of the web app
+    os.environ.setdefault("SCHEDULER_MODE", "off")
+    from app.app import create_app
+
+    app = create_app(args.config)
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            generate(
+                connection,
+                args.patients,
+                args.doctors,
+                args.appointments,
+                employees=args.employees,
+                seed=args.seed,
+                start_date=args.start_date,
+                occupancy=args.occupancy,
+                chunk_size=args.chunk_size,
+                report=print_report,
+            )
+
+
+if __name__ == "__main__":
+    main()
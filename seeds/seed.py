@@ -12,6 +12,7 @@ from datetime import date
 
 def seed_database():
     with app.app_context():
+        db.create_all()
         if Employee.query.first():
             print("Database already seeded.")
             return